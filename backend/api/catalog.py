@@ -0,0 +1,184 @@
+"""
+Кеши справочников в памяти процесса со сбросом по версии данных в БД.
+In-process catalog caches invalidated by the data version in the DB.
+"""
+import gzip
+import threading
+import time
+from abc import ABC, abstractmethod
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from rest_framework.renderers import JSONRenderer
+
+from recipes.models import DataVersion, Ingredient, Recipe, Tag
+from recipes.signals import INGREDIENTS_VERSION, RECIPES_VERSION, TAGS_VERSION
+
+from .serializers import IngredientSerializer, TagSerializer
+
+
+class VersionedCache(ABC):
+    """
+    Базовый кеш, перестраиваемый при смене версии набора данных;
+    версия проверяется не чаще check_interval секунд.
+    Base cache rebuilt when the data set version changes;
+    the version is checked at most every check_interval seconds.
+    """
+    version_name = None
+
+    def __init__(self, check_interval=None):
+        self.check_interval = check_interval
+        self.lock = threading.Lock()
+        self.version = None
+        self.checked_at = 0
+
+    @abstractmethod
+    def build(self, version):
+        """
+        Метод построения содержимого кеша для версии.
+        The method of building the cache contents for the version.
+        """
+
+    def invalidate(self):
+        """
+        Метод пометки кеша устаревшим.
+        The method of marking the cache as stale.
+        """
+        self.checked_at = 0
+
+    def refresh(self):
+        """
+        Метод перестроения кеша при смене версии в БД.
+        The method of rebuilding the cache when the DB version changes.
+        """
+        check_interval = self.check_interval
+        if check_interval is None:
+            check_interval = settings.CATALOG_VERSION_CHECK_INTERVAL
+        if time.monotonic() - self.checked_at < check_interval:
+            return
+        with self.lock:
+            if time.monotonic() - self.checked_at < check_interval:
+                return
+            version = DataVersion.get_version(self.version_name)
+            if version != self.version:
+                self.build(version)
+            self.checked_at = time.monotonic()
+
+
+class CatalogResponseCache(VersionedCache):
+    """
+    Сериализованный заранее список справочника с ETag по версии
+    и, при необходимости, сжатой gzip копией.
+    A pre-serialized catalog list with the ETag by version
+    and, optionally, a gzip-compressed copy.
+    """
+
+    def __init__(self, version_name, queryset, serializer_class,
+                 compress=False, check_interval=None):
+        super().__init__(check_interval)
+        self.version_name = version_name
+        self.queryset = queryset
+        self.serializer_class = serializer_class
+        self.compress = compress
+        self.payload = None
+
+    def build(self, version):
+        """
+        Метод сериализации справочника в JSON и gzip.
+        The method of serializing the catalog to JSON and gzip.
+        """
+        data = self.serializer_class(self.queryset.all(), many=True).data
+        body = JSONRenderer().render(data)
+        compressed = gzip.compress(body, 9) if self.compress else None
+        self.payload = (f'W/"{self.version_name}-{version}"', body, compressed)
+        self.version = version
+
+    def response(self, request):
+        """
+        Метод формирования ответа: 304 при совпадении If-None-Match,
+        иначе готовое тело, сжатое, если клиент принимает gzip.
+        The method of building the response: 304 if If-None-Match
+        matches, otherwise the ready body, compressed if the client
+        accepts gzip.
+        """
+        self.refresh()
+        etag, body, compressed = self.payload
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            accepts_gzip = 'gzip' in request.META.get(
+                'HTTP_ACCEPT_ENCODING', '')
+            if compressed is not None and accepts_gzip:
+                response = HttpResponse(
+                    compressed, content_type='application/json')
+                response['Content-Encoding'] = 'gzip'
+            else:
+                response = HttpResponse(body, content_type='application/json')
+        response['ETag'] = etag
+        if self.compress:
+            patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+
+class DataVersionTracker(VersionedCache):
+    """
+    Версия набора данных, известная процессу; проверяется в БД не чаще
+    check_interval секунд.
+    The data set version known to the process; checked in the DB at most
+    every check_interval seconds.
+    """
+
+    def __init__(self, version_name, check_interval=None):
+        super().__init__(check_interval)
+        self.version_name = version_name
+
+    def build(self, version):
+        self.version = version
+
+    def current(self):
+        """
+        Метод получения версии набора данных.
+        The method of getting the data set version.
+        """
+        self.refresh()
+        return self.version
+
+
+tag_catalog = CatalogResponseCache(
+    TAGS_VERSION, Tag.objects.order_by('id'), TagSerializer)
+ingredient_catalog = CatalogResponseCache(
+    INGREDIENTS_VERSION, Ingredient.objects.order_by('id'),
+    IngredientSerializer, compress=True)
+recipes_version = DataVersionTracker(RECIPES_VERSION)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tag_catalog(sender, **kwargs):
+    """
+    Сброс кеша тегов процесса при изменении тегов.
+    Resetting the process tag cache when tags change.
+    """
+    tag_catalog.invalidate()
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_ingredient_catalog(sender, **kwargs):
+    """
+    Сброс кеша продуктов процесса при изменении продуктов.
+    Resetting the process product cache when products change.
+    """
+    ingredient_catalog.invalidate()
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def invalidate_recipes_version(sender, **kwargs):
+    """
+    Перепроверка версии рецептов процесса при изменении рецептов.
+    Rechecking the process recipes version when recipes change.
+    """
+    recipes_version.invalidate()
@@ -0,0 +1,81 @@
+"""
+Условные запросы рецептов: ETag и Last-Modified по времени изменения
+рецептов и состоянию пользователя.
+Conditional recipe requests: ETag and Last-Modified by the recipe
+modification time and the viewer's state.
+"""
+import json
+from calendar import timegm
+from hashlib import md5
+
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+
+def is_conditional(request):
+    """
+    Проверка наличия в запросе заголовков условного запроса.
+    Checking whether the request has conditional request headers.
+    """
+    return ('HTTP_IF_NONE_MATCH' in request.META
+            or 'HTTP_IF_MODIFIED_SINCE' in request.META)
+
+
+def author_subscribed(recipe):
+    if hasattr(recipe, 'is_author_subscribed'):
+        return recipe.is_author_subscribed
+    return recipe.author.is_subscribed
+
+
+def recipe_validators(request, recipes, envelope=None):
+    """
+    ETag и Last-Modified рецептов в том виде, в каком их видит
+    пользователь. Last-Modified отдаётся только анонимным пользователям
+    для одного рецепта: флаги пользователя и состав страницы списка
+    меняются без изменения updated_at.
+    The ETag and Last-Modified of the recipes as the viewer sees them.
+    Last-Modified is only given to anonymous users for a single recipe:
+    the viewer's flags and the list page contents change without
+    changing updated_at.
+    """
+    rows = [
+        (recipe.id, recipe.updated_at.isoformat(), recipe.is_favorited,
+         recipe.is_in_shopping_cart, author_subscribed(recipe))
+        for recipe in recipes
+    ]
+    signature = json.dumps([
+        request.build_absolute_uri(), request.accepted_renderer.format,
+        envelope, rows,
+    ], default=str, sort_keys=True)
+    etag = f'W/"{md5(signature.encode()).hexdigest()}"'
+    last_modified = None
+    if request.user.is_anonymous and envelope is None and recipes:
+        last_modified = timegm(recipes[0].updated_at.utctimetuple())
+    return etag, last_modified
+
+
+def set_validators(response, validators):
+    """
+    Установка заголовков ETag, Last-Modified и Vary ответа.
+    Setting the ETag, Last-Modified and Vary headers of the response.
+    """
+    etag, last_modified = validators
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    patch_vary_headers(response, ('Authorization',))
+    return response
+
+
+def not_modified_response(request, validators):
+    """
+    Ответ 304, если представление у клиента актуально, иначе None.
+    A 304 response if the client's representation is current,
+    otherwise None.
+    """
+    etag, last_modified = validators
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified)
+    if response is None:
+        return None
+    return set_validators(response, validators)
@@ -0,0 +1,114 @@
+"""
+Кеш сформированных документов списка покупок в файловом хранилище
+с адресацией по содержимому и вытеснением давно не использованных.
+Cache of rendered shopping list documents in file storage,
+content-addressed with least recently used eviction.
+"""
+import json
+import os
+import tempfile
+from hashlib import sha256
+
+from django.conf import settings
+
+from .pdf import render_shopping_list
+
+
+class DocumentCache:
+    """
+    Файлы документов в каталоге, названные по хешу содержимого корзины
+    и формата; общий размер ограничен max_bytes.
+    Document files in a directory named by the hash of the cart
+    contents and the format; the total size is limited by max_bytes.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def key(items, document_format):
+        """
+        Метод получения ключа документа по строкам корзины и формату.
+        The method of getting the document key by the cart rows
+        and the format.
+        """
+        content = json.dumps(
+            [document_format, list(items)], sort_keys=True, default=str,
+            ensure_ascii=False)
+        return f'{sha256(content.encode()).hexdigest()}.{document_format}'
+
+    def path(self, key):
+        return os.path.join(self.directory, key)
+
+    def get(self, key):
+        """
+        Метод чтения документа; время изменения файла обновляется
+        для порядка вытеснения.
+        The method of reading a document; the file modification time
+        is updated for the eviction order.
+        """
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as document:
+                content = document.read()
+            os.utime(path)
+        except OSError:
+            return None
+        return content
+
+    def put(self, key, content):
+        """
+        Метод атомарной записи документа и вытеснения старых.
+        The method of atomically writing a document and evicting old ones.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        descriptor, temp_path = tempfile.mkstemp(dir=self.directory,
+                                                 suffix='.tmp')
+        with os.fdopen(descriptor, 'wb') as document:
+            document.write(content)
+        os.replace(temp_path, self.path(key))
+        self.evict()
+
+    def evict(self):
+        """
+        Метод удаления давно не использованных документов сверх лимита.
+        The method of deleting least recently used documents over the limit.
+        """
+        entries = []
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                if entry.is_file() and not entry.name.endswith('.tmp'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+
+shopping_list_documents = DocumentCache(
+    settings.SHOPPING_LIST_CACHE_DIR, settings.SHOPPING_LIST_CACHE_MAX_BYTES)
+
+
+def get_shopping_list_pdf(items):
+    """
+    PDF списка покупок из кеша либо сформированный заново в потоке
+    запроса: клиент ждёт файл в ответе, а остальные потоки рабочего
+    процесса gthread продолжают обслуживать запросы.
+    The shopping list PDF from the cache or rendered anew in the request
+    thread: the client expects the file in the response, and the other
+    threads of the gthread worker keep serving requests.
+    """
+    items = list(items)
+    key = shopping_list_documents.key(items, 'pdf')
+    document = shopping_list_documents.get(key)
+    if document is None:
+        document = render_shopping_list(items)
+        shopping_list_documents.put(key, document)
+    return document
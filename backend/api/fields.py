@@ -0,0 +1,149 @@
+"""
+Поле загрузки фотографии рецепта с записью декодированных данных
+во временный файл.
+A recipe photo upload field spooling the decoded data to a temporary file.
+"""
+import binascii
+import uuid
+
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile, UploadedFile
+from PIL import Image
+from rest_framework import serializers
+
+# Length of the base64 text decoded at a time; a multiple of 4.
+CHUNK_SIZE = 64 * 1024
+# Leading bytes of the supported formats: (signature, offset, format).
+SIGNATURES = (
+    (b'\xff\xd8\xff', 0, 'jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 0, 'png'),
+    (b'GIF87a', 0, 'gif'),
+    (b'GIF89a', 0, 'gif'),
+    (b'WEBP', 8, 'webp'),
+)
+CONTENT_TYPES = {
+    'jpeg': 'image/jpeg',
+    'png': 'image/png',
+    'gif': 'image/gif',
+    'webp': 'image/webp',
+}
+
+
+def sniff_format(header):
+    """
+    Определение формата изображения по первым байтам файла.
+    Detecting the image format by the first bytes of the file.
+    """
+    for signature, offset, image_format in SIGNATURES:
+        if header[offset:offset + len(signature)] == signature:
+            if image_format != 'webp' or header[:4] == b'RIFF':
+                return image_format
+    return None
+
+
+class StreamingImageField(serializers.ImageField):
+    """
+    Поле фотографии, принимающее строку base64 (data URI) или файл
+    из multipart запроса. Строка base64 приходит уже разобранной
+    из JSON тела в памяти, размер которого ограничивает LimitedJSONParser;
+    во временный файл частями записываются только декодированные байты.
+    Размер, формат по заголовку и число пикселей проверяются до полной
+    проверки изображения.
+    A photo field accepting a base64 string (data URI) or a file from
+    a multipart request. The base64 string arrives already parsed from
+    the JSON body in memory, whose size LimitedJSONParser bounds; only
+    the decoded bytes are written in chunks to a temporary file.
+    The size, the format by the header and the pixel count are checked
+    before the full image validation.
+    """
+    default_error_messages = {
+        'invalid_base64': 'Не удалось декодировать изображение base64.',
+        'invalid_format': 'Допустимые форматы: JPEG, PNG, GIF, WebP.',
+        'too_large': 'Размер изображения превышает {max_bytes} байт.',
+        'too_many_pixels': 'Изображение больше {max_pixels} пикселей.',
+    }
+
+    def to_internal_value(self, data):
+        """
+        Метод получения проверенного файла изображения.
+        The method of getting the validated image file.
+        """
+        if isinstance(data, str):
+            file = self.decode(data)
+            try:
+                return self.validate_file(file)
+            except Exception:
+                # The decoded temporary file is only removed on close.
+                file.close()
+                raise
+        if isinstance(data, UploadedFile):
+            self.check_size(data.size)
+            data.seek(0)
+            image_format = sniff_format(data.read(16))
+            if image_format is None:
+                self.fail('invalid_format')
+            data.name = f'{uuid.uuid4()}.{image_format}'
+            return self.validate_file(data)
+        self.fail('invalid')
+
+    def validate_file(self, file):
+        self.check_pixels(file)
+        return super().to_internal_value(file)
+
+    def check_size(self, size):
+        max_bytes = settings.RECIPE_IMAGE_MAX_BYTES
+        if size > max_bytes:
+            self.fail('too_large', max_bytes=max_bytes)
+
+    def check_pixels(self, file):
+        max_pixels = settings.RECIPE_IMAGE_MAX_PIXELS
+        file.seek(0)
+        try:
+            width, height = Image.open(file).size
+        except (OSError, Image.DecompressionBombError):
+            self.fail('invalid_image')
+        if width * height > max_pixels:
+            self.fail('too_many_pixels', max_pixels=max_pixels)
+        file.seek(0)
+
+    def decode(self, data):
+        """
+        Метод декодирования base64 частями во временный файл.
+        The method of decoding base64 in chunks to a temporary file.
+        """
+        start = data.find(';base64,')
+        start = 0 if start == -1 else start + len(';base64,')
+        # Every 4 base64 characters hold 3 bytes, so an oversized image
+        # is rejected before decoding.
+        self.check_size((len(data) - start) * 3 // 4 - 2)
+
+        file = TemporaryUploadedFile('upload', None, 0, None)
+        image_format = None
+        size = 0
+        remainder = ''
+        try:
+            for position in range(start, len(data), CHUNK_SIZE):
+                chunk = remainder + ''.join(
+                    data[position:position + CHUNK_SIZE].split())
+                usable = len(chunk) - len(chunk) % 4
+                remainder = chunk[usable:]
+                decoded = binascii.a2b_base64(chunk[:usable])
+                if image_format is None:
+                    image_format = sniff_format(decoded[:16])
+                    if image_format is None:
+                        self.fail('invalid_format')
+                size += len(decoded)
+                self.check_size(size)
+                file.write(decoded)
+            if remainder or image_format is None:
+                self.fail('invalid_base64')
+        except binascii.Error:
+            file.close()
+            self.fail('invalid_base64')
+        except serializers.ValidationError:
+            file.close()
+            raise
+        file.name = f'{uuid.uuid4()}.{image_format}'
+        file.content_type = CONTENT_TYPES[image_format]
+        file.size = size
+        return file
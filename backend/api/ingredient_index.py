@@ -0,0 +1,92 @@
+"""
+Индекс продуктов в памяти процесса для поиска по началу названия.
+In-process product index for the name prefix search.
+"""
+from bisect import bisect_left
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from recipes.models import Ingredient
+from recipes.signals import INGREDIENTS_VERSION
+
+from .catalog import VersionedCache
+
+
+def normalize(name):
+    """
+    Приведение названия к виду для сравнения без учета регистра,
+    как UPPER() в запросе istartswith.
+    Normalizing a name for case-insensitive comparison,
+    like UPPER() in the istartswith query.
+    """
+    return name.upper()
+
+
+class IngredientPrefixIndex(VersionedCache):
+    """
+    Отсортированный список нормализованных названий продуктов
+    с поиском по префиксу двоичным поиском.
+    A sorted list of normalized product names with the prefix search
+    by binary search.
+    """
+    version_name = INGREDIENTS_VERSION
+
+    def __init__(self, check_interval=None):
+        super().__init__(check_interval)
+        self.entries = ([], [])
+
+    def build(self, version):
+        """
+        Метод построения индекса из таблицы продуктов.
+        The method of building the index from the product table.
+        """
+        rows = sorted(
+            (
+                (normalize(name), pk, name, unit)
+                for pk, name, unit in Ingredient.objects.values_list(
+                    'id', 'name', 'measurement_unit').iterator()
+            ),
+        )
+        self.entries = (
+            [row[0] for row in rows],
+            [
+                {'id': pk, 'name': name, 'measurement_unit': unit}
+                for _, pk, name, unit in rows
+            ],
+        )
+        self.version = version
+
+    def search(self, terms):
+        """
+        Метод поиска продуктов, названия которых начинаются
+        с каждого из слов запроса; порядок как у выборки из БД.
+        The method of searching for products whose names start
+        with every search term; ordered like the DB query.
+        """
+        self.refresh()
+        keys, rows = self.entries
+        terms = [normalize(term) for term in terms]
+        if not terms:
+            return sorted(rows, key=lambda row: row['id'])
+        longest = max(terms, key=len)
+        position = bisect_left(keys, longest)
+        matches = []
+        while position < len(keys) and keys[position].startswith(longest):
+            if all(keys[position].startswith(term) for term in terms):
+                matches.append(rows[position])
+            position += 1
+        return sorted(matches, key=lambda row: row['id'])
+
+
+ingredient_index = IngredientPrefixIndex()
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_ingredient_index(sender, **kwargs):
+    """
+    Сброс индекса процесса при изменении продуктов.
+    Resetting the process index when products change.
+    """
+    ingredient_index.invalidate()
@@ -0,0 +1,145 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, Recipe, Tag
+from users.models import CustomUser
+
+# Empty caches of the audit process, so that every request runs its queries.
+AUDIT_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': 'audit-default'},
+    'responses': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                  'LOCATION': 'audit-responses'},
+}
+
+
+class Command(BaseCommand):
+    help = ('Requests every API endpoint against the current (seeded) '
+            'database, runs EXPLAIN on each SELECT it issues and flags '
+            'sequential scans.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            help='Email of the user for authenticated endpoints '
+                 '(defaults to a user with a shopping cart).')
+        parser.add_argument(
+            '--allow-seqscan', action='store_true',
+            help='Do not run SET enable_seqscan = off on PostgreSQL. '
+                 'By default sequential scans are disabled, so one in a '
+                 'plan means no index can serve the query.')
+        parser.add_argument(
+            '--fail-on-seqscan', action='store_true',
+            help='Exit with an error if any sequential scan is found.')
+
+    def handle(self, *args, **options):
+        user = self.get_user(options['user'])
+        anonymous = APIClient()
+        client = APIClient()
+        if user is not None:
+            client.force_authenticate(user)
+        if connection.vendor == 'postgresql' and not options['allow_seqscan']:
+            with connection.cursor() as cursor:
+                cursor.execute('SET enable_seqscan = off')
+
+        flagged = []
+        with override_settings(CACHES=AUDIT_CACHES):
+            for route_client, label, url in self.get_requests(
+                    user, anonymous, client):
+                with CaptureQueriesContext(connection) as queries:
+                    response = route_client.get(url)
+                self.stdout.write(
+                    f'{label} {url} -> {response.status_code}, '
+                    f'{len(queries.captured_queries)} queries')
+                for query in queries.captured_queries:
+                    sql = query['sql']
+                    if not sql.lstrip().upper().startswith('SELECT'):
+                        continue
+                    for table in self.seq_scans(sql):
+                        flagged.append((url, table))
+                        self.stdout.write(self.style.WARNING(
+                            f'  seq scan on {table}: {sql[:200]}'))
+
+        if not flagged:
+            self.stdout.write(self.style.SUCCESS('No sequential scans found'))
+        elif options['fail_on_seqscan']:
+            raise CommandError(f'{len(flagged)} sequential scans found')
+
+    def get_requests(self, user, anonymous, client):
+        # The anonymous feed is the busiest query, so the public URLs are
+        # audited anonymously and then as the user.
+        public, private = self.get_urls(user)
+        for url in public:
+            yield anonymous, 'anonymous', url
+        if user is not None:
+            for url in public + private:
+                yield client, user.email, url
+
+    def get_user(self, email):
+        if email:
+            try:
+                return CustomUser.objects.get(email=email)
+            except CustomUser.DoesNotExist:
+                raise CommandError(f'User {email} does not exist')
+        return (CustomUser.objects.filter(shoppingcart__isnull=False).first()
+                or CustomUser.objects.first())
+
+    def get_urls(self, user):
+        recipe = Recipe.objects.order_by('-id').first()
+        tags = list(Tag.objects.values_list('slug', flat=True)[:2])
+        ingredient = Ingredient.objects.order_by('id').first()
+        urls = [
+            '/api/recipes/',
+            '/api/recipes/?page=2',
+            '/api/recipes/?pagination=cursor',
+            '/api/tags/',
+            '/api/ingredients/',
+            '/api/users/',
+        ]
+        if tags:
+            urls.append('/api/recipes/?' + '&'.join(
+                f'tags={slug}' for slug in tags))
+        if recipe is not None:
+            urls.append(f'/api/recipes/{recipe.id}/')
+            urls.append(f'/api/recipes/?author={recipe.author_id}')
+        if ingredient is not None:
+            urls.append(f'/api/ingredients/?name={ingredient.name[:2]}')
+        private = []
+        if user is not None:
+            private = [
+                '/api/recipes/?is_favorited=1',
+                '/api/recipes/?is_in_shopping_cart=1',
+                '/api/users/me/',
+                '/api/users/subscriptions/?recipes_limit=3',
+                '/api/recipes/download_shopping_cart/',
+            ]
+        return urls, private
+
+    def seq_scans(self, sql):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('EXPLAIN (FORMAT JSON) ' + sql)
+                plan = cursor.fetchone()[0]
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                return list(self.walk_postgresql_plan(plan[0]['Plan']))
+            if connection.vendor == 'sqlite':
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+                return [
+                    row[-1].split()[-1] for row in cursor.fetchall()
+                    if row[-1].startswith('SCAN')
+                    and 'USING' not in row[-1]
+                    and 'SUBQUERY' not in row[-1].upper()
+                ]
+        return []
+
+    def walk_postgresql_plan(self, node):
+        if node['Node Type'] == 'Seq Scan':
+            yield node['Relation Name']
+        for child in node.get('Plans', []):
+            yield from self.walk_postgresql_plan(child)
@@ -0,0 +1,264 @@
+import json
+import math
+import shutil
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from rest_framework.authtoken.models import Token
+
+from foodgram.query_stats import QueryStats
+from recipes.models import Favorite, Ingredient, Recipe, Subscribe, Tag
+from recipes.seeding import DatasetBuilder
+from users.models import CustomUser
+
+PERCENTILES = (50, 95, 99)
+PASSWORD = 'bench-Pa55word'
+IMAGE = ('data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABAQMAAAAl21b'
+         'KAAAAA1BMVEUAAACnej3aAAAAAXRSTlMAQObYZgAAAApJREFUCNdjYAAAAAIAAeIhvD'
+         'MAAAAASUVORK5CYII=')
+# Caches of the benchmark process only: responses computed from the rolled
+# back dataset must not reach the shared response cache.
+BENCH_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': 'bench-default'},
+    'responses': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                  'LOCATION': 'bench-responses'},
+}
+
+
+def percentile(timings, percent):
+    ordered = sorted(timings)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+class Command(BaseCommand):
+    help = ('Builds a reproducible dataset, drives the API routes through '
+            'the Django test client and reports latency percentiles, queries '
+            'and response bytes per route as JSON. Compares the results with '
+            'a stored baseline. Runs inside a rolled back transaction.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--recipes', type=int, default=500)
+        parser.add_argument('--ingredients-per-recipe', type=int, default=6)
+        parser.add_argument(
+            '--favorites', type=int, default=10,
+            help='Mean favorites per user.')
+        parser.add_argument(
+            '--carts', type=int, default=5,
+            help='Mean shopping cart recipes per user.')
+        parser.add_argument(
+            '--subscriptions', type=int, default=5,
+            help='Mean subscriptions per user.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--requests', type=int, default=30,
+            help='Measured requests per route, after one warm-up request.')
+        parser.add_argument(
+            '--output', help='Write the JSON report to this file.')
+        parser.add_argument(
+            '--baseline', help='Baseline JSON report to compare with.')
+        parser.add_argument(
+            '--save-baseline', action='store_true',
+            help='Write the report to the --baseline file.')
+        parser.add_argument(
+            '--tolerance', type=float, default=0.2,
+            help='Allowed relative growth of p95 latency and bytes.')
+
+    def handle(self, *args, **options):
+        if options['save_baseline'] and not options['baseline']:
+            raise CommandError('--save-baseline requires --baseline')
+        dataset = {
+            name: options[name] for name in (
+                'users', 'recipes', 'ingredients_per_recipe', 'favorites',
+                'carts', 'subscriptions', 'seed')
+        }
+        media_root = tempfile.mkdtemp(prefix='bench-media-')
+        try:
+            bench_settings = override_settings(
+                CACHES=BENCH_CACHES, MEDIA_ROOT=media_root,
+                DATABASE_REPLICAS=[])
+            with bench_settings, transaction.atomic():
+                DatasetBuilder(seed=options['seed']).build(
+                    users=options['users'], recipes=options['recipes'],
+                    ingredients_per_recipe=options['ingredients_per_recipe'],
+                    favorites=options['favorites'], carts=options['carts'],
+                    subscriptions=options['subscriptions'])
+                routes = self.run_routes(options['requests'])
+                transaction.set_rollback(True)
+        finally:
+            shutil.rmtree(media_root, ignore_errors=True)
+        report = {
+            'database': connection.vendor,
+            'dataset': dataset,
+            'requests': options['requests'],
+            'routes': routes,
+        }
+        text = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(text)
+        self.stdout.write(text)
+        if options['baseline'] and options['save_baseline']:
+            with open(options['baseline'], 'w', encoding='utf-8') as file:
+                file.write(text)
+            self.stderr.write(f'Baseline saved to {options["baseline"]}')
+        elif options['baseline']:
+            self.compare(report, options['baseline'], options['tolerance'])
+
+    def run_routes(self, count):
+        seeded = CustomUser.objects.filter(username__startswith='seed')
+        user = seeded.latest('id')
+        token = Token.objects.create(user=user)
+        # Logging out deletes the user's token, so another user logs in.
+        login_user = seeded.earliest('id')
+        login_user.set_password(PASSWORD)
+        login_user.save()
+        client = Client(HTTP_AUTHORIZATION=f'Token {token.key}')
+        anonymous = Client()
+        recipe = Recipe.objects.filter(author=user).first() or (
+            Recipe.objects.latest('id'))
+        other = Recipe.objects.exclude(
+            id__in=Favorite.objects.filter(user=user).values('recipe_id')
+        ).exclude(carts__user=user).latest('id')
+        author = CustomUser.objects.exclude(id=user.id).exclude(
+            id__in=Subscribe.objects.filter(user=user).values(
+                'following_id')).latest('id')
+        tag = Tag.objects.order_by('id').first()
+        ingredient = Ingredient.objects.order_by('id').first()
+        reads = (
+            ('users-list', client, '/api/users/'),
+            ('users-detail', client, f'/api/users/{author.id}/'),
+            ('users-me', client, '/api/users/me/'),
+            ('subscriptions', client, '/api/users/subscriptions/'),
+            ('tags-list', client, '/api/tags/'),
+            ('tags-detail', client, f'/api/tags/{tag.id}/'),
+            ('ingredients-list', client,
+             f'/api/ingredients/?name={ingredient.name[:2]}'),
+            ('ingredients-detail', client,
+             f'/api/ingredients/{ingredient.id}/'),
+            ('recipes-list', client, '/api/recipes/'),
+            ('recipes-list-anonymous', anonymous, '/api/recipes/'),
+            ('recipes-list-favorited', client,
+             '/api/recipes/?is_favorited=1'),
+            ('recipes-list-tag', client, f'/api/recipes/?tags={tag.slug}'),
+            ('recipes-detail', client, f'/api/recipes/{recipe.id}/'),
+            ('recipes-detail-anonymous', anonymous,
+             f'/api/recipes/{recipe.id}/'),
+            ('download', client, '/api/recipes/download_shopping_cart/'),
+        )
+        timings = {}
+        for name, route_client, path in reads:
+            for number in range(count + 1):
+                self.measure(timings, name, 'GET', path, number,
+                             lambda: route_client.get(path))
+        recipe_body = {
+            'name': 'Bench', 'text': 'Bench', 'cooking_time': 10,
+            'image': IMAGE, 'tags': [tag.id],
+            'ingredients': [{'id': ingredient.id, 'amount': 10}],
+        }
+        pairs = (
+            ('favorite', f'/api/recipes/{other.id}/favorite/'),
+            ('shopping-cart', f'/api/recipes/{other.id}/shopping_cart/'),
+            ('subscribe', f'/api/users/{author.id}/subscribe/'),
+        )
+        for number in range(count + 1):
+            for name, path in pairs:
+                self.measure(timings, f'{name}-create', 'POST', path, number,
+                             lambda: client.post(path))
+                self.measure(timings, f'{name}-delete', 'DELETE', path,
+                             number, lambda: client.delete(path))
+            response = self.measure(
+                timings, 'recipes-create', 'POST', '/api/recipes/', number,
+                lambda: client.post('/api/recipes/', recipe_body,
+                                    content_type='application/json'))
+            path = f'/api/recipes/{response.json()["id"]}/'
+            self.measure(
+                timings, 'recipes-update', 'PATCH', path, number,
+                lambda: client.patch(path, {**recipe_body, 'name': 'Edit'},
+                                     content_type='application/json'))
+            self.measure(timings, 'recipes-delete', 'DELETE', path, number,
+                         lambda: client.delete(path))
+            body = {'email': f'bench{number}@bench.test',
+                    'username': f'bench{number}', 'first_name': 'Bench',
+                    'last_name': 'Bench', 'password': PASSWORD}
+            self.measure(
+                timings, 'users-create', 'POST', '/api/users/', number,
+                lambda: anonymous.post('/api/users/', body))
+            response = self.measure(
+                timings, 'token-login', 'POST', '/api/auth/token/login/',
+                number, lambda: anonymous.post(
+                    '/api/auth/token/login/',
+                    {'email': login_user.email, 'password': PASSWORD}))
+            session = Client(
+                HTTP_AUTHORIZATION=f'Token {response.json()["auth_token"]}')
+            self.measure(
+                timings, 'token-logout', 'POST', '/api/auth/token/logout/',
+                number, lambda: session.post('/api/auth/token/logout/'))
+        return {name: self.summary(route)
+                for name, route in timings.items()}
+
+    def measure(self, timings, name, method, path, number, send):
+        stats = QueryStats()
+        started = time.perf_counter()
+        with stats.record():
+            response = send()
+            content = (b''.join(response.streaming_content)
+                       if response.streaming else response.content)
+        elapsed = time.perf_counter() - started
+        if response.status_code >= 400:
+            raise CommandError(
+                f'{method} {path}: {response.status_code} {content[:200]}')
+        route = timings.setdefault(name, {
+            'method': method, 'path': path, 'status': response.status_code,
+            'timings': [], 'queries': [], 'bytes': [],
+        })
+        # The first request of each route warms up the caches.
+        if number:
+            route['timings'].append(elapsed)
+            route['queries'].append(stats.count)
+            route['bytes'].append(len(content))
+        return response
+
+    def summary(self, route):
+        summary = {key: route[key] for key in ('method', 'path', 'status')}
+        for percent in PERCENTILES:
+            summary[f'p{percent}_ms'] = round(
+                percentile(route['timings'], percent) * 1000, 2)
+        summary['queries'] = max(route['queries'])
+        summary['bytes'] = max(route['bytes'])
+        return summary
+
+    def compare(self, report, path, tolerance):
+        with open(path, encoding='utf-8') as file:
+            baseline = json.load(file)
+        if baseline['dataset'] != report['dataset']:
+            self.stderr.write('Warning: the baseline dataset differs.')
+        regressions = []
+        for name, route in report['routes'].items():
+            old = baseline['routes'].get(name)
+            if old is None:
+                self.stderr.write(f'{name}: not in the baseline')
+                continue
+            self.stderr.write(
+                f'{name:<26} p95 {old["p95_ms"]:>8.2f} -> '
+                f'{route["p95_ms"]:>8.2f}ms  queries {old["queries"]:>3} -> '
+                f'{route["queries"]:>3}  bytes {old["bytes"]:>7} -> '
+                f'{route["bytes"]:>7}')
+            # Latency under a millisecond of the baseline is noise.
+            if (route['p95_ms'] > old['p95_ms'] * (1 + tolerance)
+                    and route['p95_ms'] - old['p95_ms'] > 1):
+                regressions.append(f'{name}: p95 latency')
+            if route['queries'] > old['queries']:
+                regressions.append(f'{name}: queries')
+            if route['bytes'] > old['bytes'] * (1 + tolerance):
+                regressions.append(f'{name}: bytes')
+        if regressions:
+            raise CommandError(
+                'Regressions against the baseline:\n'
+                + '\n'.join(regressions))
+        self.stderr.write(self.style.SUCCESS('No regressions'))
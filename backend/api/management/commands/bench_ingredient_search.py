@@ -0,0 +1,88 @@
+import csv
+import os
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.ingredient_index import IngredientPrefixIndex
+from recipes.models import Ingredient
+
+
+class Command(BaseCommand):
+    help = ('Benchmarks the ingredient prefix search: the DB istartswith '
+            'query against the in-memory index. Runs inside a rolled back '
+            'transaction.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=os.path.join(
+                settings.BASE_DIR, 'recipes', 'data', 'ingredients.csv'),
+            help='CSV catalog to load (name, measurement unit).')
+        parser.add_argument(
+            '--scales', nargs='+', type=int, default=[1, 100],
+            help='How many copies of the catalog to load.')
+        parser.add_argument(
+            '--repeat', type=int, default=3,
+            help='How many times to run the whole prefix set.')
+
+    def handle(self, *args, **options):
+        with open(options['path'], encoding='utf-8') as f:
+            catalog = [tuple(row) for row in csv.reader(f) if row]
+        prefixes = sorted({name[:length] for name, _ in catalog[::20]
+                           for length in (1, 2, 3)})
+        for scale in options['scales']:
+            with transaction.atomic():
+                self.load(catalog, scale)
+                self.bench(scale, prefixes, options['repeat'])
+                transaction.set_rollback(True)
+
+    def load(self, catalog, scale):
+        Ingredient.objects.bulk_create(
+            (
+                Ingredient(name=name if copy == 0 else f'{name} {copy}',
+                           measurement_unit=unit)
+                for copy in range(scale) for name, unit in catalog
+            ),
+            batch_size=500,
+            ignore_conflicts=True,
+        )
+
+    def bench(self, scale, prefixes, repeat):
+        rows = Ingredient.objects.count()
+        index = IngredientPrefixIndex(check_interval=float('inf'))
+        started = time.perf_counter()
+        index.build(version=0)
+        build_time = time.perf_counter() - started
+        index.checked_at = time.monotonic()
+
+        def run_db(prefix):
+            return list(Ingredient.objects.filter(
+                name__istartswith=prefix).values(
+                'id', 'name', 'measurement_unit'))
+
+        def run_index(prefix):
+            return index.search([prefix])
+
+        for prefix in prefixes:
+            db_ids = sorted(row['id'] for row in run_db(prefix))
+            if db_ids != [row['id'] for row in run_index(prefix)]:
+                self.stderr.write(f'Result mismatch for prefix {prefix!r}')
+        self.stdout.write(
+            f'rows={rows} prefixes={len(prefixes)} '
+            f'index build={build_time * 1000:.1f}ms')
+        for label, search in (('db', run_db), ('index', run_index)):
+            timings = []
+            for _ in range(repeat):
+                for prefix in prefixes:
+                    started = time.perf_counter()
+                    search(prefix)
+                    timings.append(time.perf_counter() - started)
+            timings.sort()
+            self.stdout.write(
+                f'  {label:<6} mean={statistics.mean(timings) * 1e6:.0f}us '
+                f'p50={timings[len(timings) // 2] * 1e6:.0f}us '
+                f'p95={timings[int(len(timings) * 0.95)] * 1e6:.0f}us')
@@ -0,0 +1,110 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.fast_serializers import (LIST_IMAGE_VARIANT, recipe_representations,
+                                  recipe_rows)
+from api.serializers import RecipeSerializer
+from recipes.models import (Favorite, Ingredient, IngredientRecipe, Recipe,
+                            ShoppingCart, Subscribe, Tag, TagRecipe)
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = ('Benchmarks the per-recipe cost of RecipeSerializer and of the '
+            'fast recipe list representation. Runs inside a rolled back '
+            'transaction.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--recipes', type=int, default=200,
+            help='How many recipes to create.')
+        parser.add_argument(
+            '--sizes', nargs='+', type=int, default=[6, 50, 200],
+            help='Numbers of recipes serialized at a time.')
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help='How many times to serialize each size.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            viewer = self.load(options['recipes'])
+            for size in options['sizes']:
+                self.bench(viewer, size, options['repeat'])
+            transaction.set_rollback(True)
+
+    def load(self, count):
+        users = [
+            CustomUser.objects.create(
+                username=f'bench{number}', email=f'bench{number}@bench.test',
+                first_name='Bench', last_name=str(number), password='-')
+            for number in range(5)
+        ]
+        viewer, authors = users[0], users[1:]
+        tags = [
+            Tag.objects.create(name=f'bench {number}', color='#00FF00',
+                               slug=f'bench-{number}')
+            for number in range(4)
+        ]
+        Ingredient.objects.bulk_create(
+            Ingredient(name=f'bench ingredient {number}',
+                       measurement_unit='г')
+            for number in range(50)
+        )
+        ingredients = list(Ingredient.objects.filter(
+            name__startswith='bench ingredient '))
+        for number in range(count):
+            recipe = Recipe.objects.create(
+                author=authors[number % len(authors)],
+                name=f'Рецепт {number}', text='Описание ' * 20,
+                image='recipes/image/bench.png', cooking_time=number + 1)
+            TagRecipe.objects.bulk_create(
+                TagRecipe(tags=tag, recipe=recipe)
+                for tag in tags[:number % len(tags) + 1])
+            IngredientRecipe.objects.bulk_create(
+                IngredientRecipe(ingredient=ingredient, recipe=recipe,
+                                 amount=number + shift)
+                for shift, ingredient in enumerate(
+                    ingredients[number % 40:number % 40 + 8]))
+            if number % 3 == 0:
+                Favorite.objects.create(user=viewer, recipe=recipe)
+            if number % 4 == 0:
+                ShoppingCart.objects.create(user=viewer, recipe=recipe)
+        Subscribe.objects.create(user=viewer, following=authors[0])
+        return viewer
+
+    def make_request(self, user):
+        request = Request(APIRequestFactory().get('/api/recipes/'))
+        request.user = user
+        return request
+
+    def serialize(self, user, size):
+        request = self.make_request(user)
+        recipes = list(Recipe.objects.with_related(user)[:size])
+        return RecipeSerializer(recipes, many=True, context={
+            'request': request, 'image_variant': LIST_IMAGE_VARIANT,
+        }).data
+
+    def represent(self, user, size):
+        request = self.make_request(user)
+        recipes = list(recipe_rows(user)[:size])
+        return recipe_representations(
+            recipes, request, image_variant=LIST_IMAGE_VARIANT)
+
+    def bench(self, user, size, repeat):
+        for label, build in (('serializer', self.serialize),
+                             ('fast', self.represent)):
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                build(user, size)
+                timings.append(time.perf_counter() - started)
+            median = statistics.median(timings)
+            self.stdout.write(
+                f'recipes={size} {label:<10} '
+                f'median={median * 1000:.1f}ms '
+                f'per recipe={median / size * 1e6:.0f}us')
@@ -0,0 +1,46 @@
+import os
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from reportlab.pdfbase.ttfonts import TTFont
+
+from api.pdf import FONTS_DIR, ITEM_FONT, render_shopping_list
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the shopping list PDF renderer for several cart sizes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', nargs='+', type=int, default=[10, 100, 1000],
+            help='Numbers of distinct ingredients in the cart.')
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help='How many times to render each cart.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        TTFont(ITEM_FONT, os.path.join(FONTS_DIR, f'{ITEM_FONT}.ttf'))
+        self.stdout.write(
+            f'font parse (saved per line by registering once): '
+            f'{(time.perf_counter() - started) * 1000:.2f}ms')
+        for size in options['sizes']:
+            items = [
+                {
+                    'ingredient__name': f'продукт {number}',
+                    'ingredient__measurement_unit': 'г',
+                    'ingredient_total': number * 10,
+                }
+                for number in range(size)
+            ]
+            timings = []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                document = render_shopping_list(items)
+                timings.append(time.perf_counter() - started)
+            self.stdout.write(
+                f'items={size} pages={document.count(b"/Type /Page") - 1} '
+                f'bytes={len(document)} '
+                f'median={statistics.median(timings) * 1000:.1f}ms '
+                f'per item={statistics.median(timings) / size * 1e6:.0f}us')
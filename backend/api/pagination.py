@@ -2,8 +2,19 @@
 Создание пагинатора.
 Creating a paginator.
 """
+from base64 import b64decode, b64encode
+from binascii import Error as Base64Error
 
-from rest_framework.pagination import PageNumberPagination
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from foodgram.pagination import CountProviderPaginator
+
+from .catalog import recipes_version
 
 
 class CustomPagination(PageNumberPagination):
@@ -13,3 +24,165 @@ class CustomPagination(PageNumberPagination):
     """
     page_size = 6
     page_size_query_param = 'limit'
+    django_paginator_class = CountProviderPaginator
+
+    def get_paginated_response(self, data):
+        """
+        Метод формирования ответа с признаком точности count.
+        The method of building the response with the count exactness flag.
+        """
+        response = super().get_paginated_response(data)
+        response.data['count_is_exact'] = self.page.paginator.count_is_exact
+        return response
+
+
+class RecipeKeysetPagination(BasePagination):
+    """
+    Курсорный пагинатор рецептов по ключу (pub_date, id)
+    без подсчета общего числа и без OFFSET.
+    Keyset paginator of recipes on the (pub_date, id) key
+    without a total count and without OFFSET.
+    """
+    page_size = CustomPagination.page_size
+    page_size_query_param = CustomPagination.page_size_query_param
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Неверный курсор. / Invalid cursor.'
+
+    def get_page_size(self, request):
+        """
+        Метод получения размера страницы из запроса.
+        The method of getting the page size from the request.
+        """
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size < 1:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def decode_cursor(self, request):
+        """
+        Метод разбора курсора: (дата публикации, id, назад ли).
+        The method of decoding the cursor: (pub date, id, is reversed).
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            reverse, pub_date, pk = b64decode(
+                encoded.encode('ascii')).decode('ascii').split('|')
+            pub_date = parse_datetime(pub_date)
+            pk = int(pk)
+        except (Base64Error, UnicodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if pub_date is None:
+            raise NotFound(self.invalid_cursor_message)
+        return pub_date, pk, reverse == 'r'
+
+    def encode_cursor(self, recipe, reverse):
+        """
+        Метод построения ссылки с курсором на позицию рецепта.
+        The method of building a link with a cursor at the recipe position.
+        """
+        cursor = '|'.join(
+            ('r' if reverse else 'f', recipe.pub_date.isoformat(),
+             str(recipe.pk)))
+        return replace_query_param(
+            self.base_url, self.cursor_query_param,
+            b64encode(cursor.encode('ascii')).decode('ascii'))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """
+        Метод получения страницы рецептов после или до курсора.
+        The method of getting a page of recipes after or before the cursor.
+        """
+        self.base_url = request.build_absolute_uri()
+        page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        reverse = cursor is not None and cursor[2]
+        if cursor is not None:
+            pub_date, pk = cursor[:2]
+            if reverse:
+                queryset = queryset.filter(
+                    Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, id__gt=pk))
+            else:
+                queryset = queryset.filter(
+                    Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, id__lt=pk))
+        if reverse:
+            queryset = queryset.order_by('pub_date', 'id')
+        else:
+            queryset = queryset.order_by('-pub_date', '-id')
+
+        results = list(queryset[:page_size + 1])
+        has_more = len(results) > page_size
+        results = results[:page_size]
+        if reverse:
+            results.reverse()
+
+        self.next = self.previous = None
+        if results:
+            if has_more or reverse:
+                self.next = self.encode_cursor(results[-1], reverse=False)
+            if cursor is not None and (has_more or not reverse):
+                self.previous = self.encode_cursor(results[0], reverse=True)
+        elif cursor is not None:
+            self.previous = remove_query_param(
+                self.base_url, self.cursor_query_param)
+        return results
+
+    def get_paginated_response(self, data):
+        """
+        Метод формирования ответа курсорного пагинатора.
+        The method of building the response of the cursor paginator.
+        """
+        return Response({
+            'next': self.next,
+            'previous': self.previous,
+            'results': data,
+        })
+
+
+class RecipeCountPaginator(CountProviderPaginator):
+    """
+    Пагинатор рецептов, число которых сбрасывается с версией рецептов.
+    The recipe paginator whose count is reset with the recipes version.
+    """
+
+    def get_count_version(self):
+        return recipes_version.current()
+
+
+class RecipePagination(CustomPagination):
+    """
+    Пагинатор рецептов: номера страниц по умолчанию
+    или курсоры при ?pagination=cursor.
+    Recipe paginator: page numbers by default
+    or cursors with ?pagination=cursor.
+    """
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+    cursor_pagination_class = RecipeKeysetPagination
+    django_paginator_class = RecipeCountPaginator
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """
+        Метод выбора режима пагинации по параметру запроса.
+        The method of selecting the pagination mode by the request parameter.
+        """
+        self.cursor_paginator = None
+        if request.query_params.get(self.mode_query_param) == self.cursor_mode:
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        """
+        Метод формирования ответа выбранного пагинатора.
+        The method of building the response of the selected paginator.
+        """
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,69 @@
+"""
+Парсеры тела запроса рецептов.
+Recipe request body parsers.
+"""
+import json
+
+from django.conf import settings
+from rest_framework import exceptions, status
+from rest_framework.parsers import DataAndFiles, JSONParser, MultiPartParser
+
+# Bytes allowed in a recipe body besides the base64 encoded image.
+BODY_OVERHEAD = 256 * 1024
+
+
+class RequestEntityTooLarge(exceptions.APIException):
+    """
+    Ошибка слишком большого тела запроса.
+    The error of a too large request body.
+    """
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = 'Тело запроса слишком большое.'
+    default_code = 'request_entity_too_large'
+
+
+class LimitedJSONParser(JSONParser):
+    """
+    JSON парсер, отклоняющий по Content-Length тело больше, чем нужно
+    для изображения RECIPE_IMAGE_MAX_BYTES в base64, до его чтения.
+    Тело в пределах ограничения разбирается в памяти целиком.
+    A JSON parser rejecting by Content-Length, before reading it, a body
+    larger than needed for a RECIPE_IMAGE_MAX_BYTES image in base64.
+    A body within the limit is parsed in memory as a whole.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        request = (parser_context or {}).get('request')
+        if request is not None:
+            try:
+                length = int(request.META.get('CONTENT_LENGTH') or 0)
+            except ValueError:
+                length = 0
+            max_length = (
+                settings.RECIPE_IMAGE_MAX_BYTES * 4 // 3 + BODY_OVERHEAD)
+            if length > max_length:
+                raise RequestEntityTooLarge()
+        return super().parse(stream, media_type, parser_context)
+
+
+class MultiPartJSONParser(MultiPartParser):
+    """
+    Multipart парсер, в котором поля рецепта передаются JSON строкой
+    в поле data, а фотография - файлом в поле image.
+    A multipart parser where the recipe fields are passed as a JSON string
+    in the data field and the photo as a file in the image field.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parsed = super().parse(stream, media_type, parser_context)
+        if 'data' not in parsed.data:
+            return parsed
+        try:
+            data = json.loads(parsed.data['data'])
+        except ValueError as error:
+            raise exceptions.ParseError(f'JSON parse error - {error}')
+        if not isinstance(data, dict):
+            raise exceptions.ParseError('The data field must be an object.')
+        # A plain dict, so that merging the files into the data gives
+        # single files rather than the lists of a MultiValueDict.
+        return DataAndFiles(data, parsed.files.dict())
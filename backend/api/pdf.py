@@ -0,0 +1,70 @@
+"""
+Формирование PDF файла списка покупок.
+Rendering the shopping list PDF file.
+"""
+import os
+from io import BytesIO
+
+from django.conf import settings
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+FONTS_DIR = os.path.join(settings.BASE_DIR, 'fonts')
+TITLE_FONT = 'FreeSans'
+ITEM_FONT = 'Miama Nueva'
+
+LEFT_POSITION = 50
+TOP_POSITION = 700
+PAGE_TOP_POSITION = A4[1] - 60
+BOTTOM_POSITION = 50
+LINE_HEIGHT = 40
+
+
+def register_fonts():
+    """
+    Регистрация шрифтов из папки fonts один раз на процесс.
+    Registering the fonts from the fonts folder once per process.
+    """
+    registered = pdfmetrics.getRegisteredFontNames()
+    for name in (TITLE_FONT, ITEM_FONT):
+        if name not in registered:
+            pdfmetrics.registerFont(
+                TTFont(name, os.path.join(FONTS_DIR, f'{name}.ttf')))
+
+
+register_fonts()
+
+
+def render_shopping_list(items):
+    """
+    Формирование PDF списка покупок с переносом на новые страницы.
+    Принимает строки с ключами ingredient__name,
+    ingredient__measurement_unit и ingredient_total.
+    Rendering the shopping list PDF flowing onto new pages.
+    Takes rows with the ingredient__name,
+    ingredient__measurement_unit and ingredient_total keys.
+    """
+    buffer = BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=A4)
+    pdf.setFont(TITLE_FONT, 25)
+    pdf.drawString(LEFT_POSITION, TOP_POSITION + 40, 'Список покупок:')
+    pdf.setFont(ITEM_FONT, 14)
+    top_position = TOP_POSITION
+    for number, item in enumerate(items, start=1):
+        if top_position < BOTTOM_POSITION:
+            pdf.showPage()
+            pdf.setFont(ITEM_FONT, 14)
+            top_position = PAGE_TOP_POSITION
+        pdf.drawString(
+            LEFT_POSITION,
+            top_position,
+            f'{number}.  {item["ingredient__name"]} - '
+            f'{item["ingredient_total"]}'
+            f'{item["ingredient__measurement_unit"]}'
+        )
+        top_position -= LINE_HEIGHT
+    pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
@@ -0,0 +1,211 @@
+"""
+Общий для рабочих процессов кеш ответов для анонимных запросов рецептов
+со сбросом по версиям данных и объединением одновременных промахов.
+A response cache for anonymous recipe requests shared by the worker
+processes, invalidated by data versions, with concurrent misses collapsed.
+"""
+import os
+import threading
+import time
+from hashlib import md5
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.filebased import FileBasedCache
+from django.http import HttpResponse
+
+from recipes.models import DataVersion
+from recipes.signals import INGREDIENTS_VERSION, RECIPES_VERSION, TAGS_VERSION
+
+LOCK_STRIPES = 64
+CACHED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Vary')
+
+
+class ResponseCache:
+    """
+    Кеш отрисованных ответов по адресу запроса, нормализованной
+    строке запроса и версиям наборов данных. Промах вычисляется одним
+    потоком процесса и, через межпроцессную блокировку, одним процессом;
+    остальные ждут его результат не дольше wait секунд.
+    A cache of rendered responses keyed by the request URL, the normalized
+    query string and the data set versions. A miss is computed by one
+    thread of the process and, through a cross-process lock, by one
+    process; the others wait for its result for at most wait seconds.
+    """
+
+    def __init__(self, alias, prefix, version_names, lock_timeout=30,
+                 wait=10, poll_interval=0.05):
+        self.alias = alias
+        self.prefix = prefix
+        self.version_names = version_names
+        self.lock_timeout = lock_timeout
+        self.wait = wait
+        self.poll_interval = poll_interval
+        self.locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def key(self, request):
+        """
+        Метод получения ключа: адрес, отсортированные параметры запроса
+        и текущие версии данных.
+        The method of getting the key: the URL, the sorted query
+        parameters and the current data versions.
+        """
+        query = urlencode(sorted(
+            (name, sorted(values))
+            for name, values in request.query_params.lists()
+        ), doseq=True)
+        versions = DataVersion.get_versions(*self.version_names)
+        signature = '|'.join((
+            request.build_absolute_uri(request.path), query,
+            request.accepted_renderer.format,
+            ':'.join(str(version) for version in versions),
+        ))
+        return f'{self.prefix}:{md5(signature.encode()).hexdigest()}'
+
+    def lock_path(self, lock_key):
+        """
+        Путь файла блокировки для файлового кеша, иначе None.
+        The lock file path for the file-based cache, None otherwise.
+        """
+        if not isinstance(self.cache, FileBasedCache):
+            return None
+        directory = settings.CACHES[self.alias]['LOCATION']
+        return os.path.join(
+            directory, md5(lock_key.encode()).hexdigest() + '.lock')
+
+    def acquire(self, lock_key):
+        """
+        Метод захвата межпроцессной блокировки. Файловый кеш не умеет
+        атомарно добавлять ключ, поэтому блокировкой служит файл,
+        созданный с O_EXCL; у остальных бэкендов add атомарен.
+        The method of acquiring the cross-process lock. The file-based
+        cache cannot add a key atomically, so the lock is a file created
+        with O_EXCL; add is atomic in the other backends.
+        """
+        path = self.lock_path(lock_key)
+        if path is None:
+            return self.cache.add(lock_key, 1, self.lock_timeout)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        for _ in range(2):
+            try:
+                os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return True
+            except FileExistsError:
+                pass
+            try:
+                age = time.time() - os.path.getmtime(path)
+            except FileNotFoundError:
+                continue
+            if age < self.lock_timeout:
+                return False
+            # The owner died while computing; take the lock over.
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        return False
+
+    def release(self, lock_key):
+        """
+        Метод снятия межпроцессной блокировки.
+        The method of releasing the cross-process lock.
+        """
+        path = self.lock_path(lock_key)
+        if path is None:
+            self.cache.delete(lock_key)
+            return
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def wait_for(self, key):
+        """
+        Метод ожидания значения, вычисляемого другим процессом.
+        The method of waiting for a value computed by another process.
+        """
+        deadline = time.monotonic() + self.wait
+        while time.monotonic() < deadline:
+            time.sleep(self.poll_interval)
+            value = self.cache.get(key)
+            if value is not None:
+                return value
+        return None
+
+    def store(self, key, compute):
+        """
+        Метод вычисления значения и записи его в кеш.
+        The method of computing a value and writing it to the cache.
+        """
+        value = compute()
+        if value is not None:
+            self.cache.set(key, value, settings.RESPONSE_CACHE_TIMEOUT)
+        return value
+
+    def get_or_compute(self, key, compute):
+        """
+        Метод получения значения из кеша либо его вычисления одним
+        исполнителем среди потоков и процессов. Потоки процесса ждут
+        владельца блокировки на замке своей полосы; ожидание другого
+        процесса идёт без замка, чтобы не задерживать чужие ключи.
+        The method of getting a value from the cache or computing it
+        by a single executor among threads and processes. The threads
+        of the process wait for the lock owner on their stripe lock;
+        waiting for another process happens without it so that other
+        keys are not held up.
+        """
+        value = self.cache.get(key)
+        if value is not None:
+            return value
+        lock_key = f'{key}:lock'
+        with self.locks[hash(key) % LOCK_STRIPES]:
+            value = self.cache.get(key)
+            if value is not None:
+                return value
+            if self.acquire(lock_key):
+                try:
+                    return self.store(key, compute)
+                finally:
+                    self.release(lock_key)
+        value = self.wait_for(key)
+        if value is not None:
+            return value
+        return self.store(key, compute)
+
+    def response(self, request, render):
+        """
+        Метод получения ответа из кеша; render возвращает отрисованный
+        ответ, в кеш попадают только ответы 200.
+        The method of getting a response from the cache; render returns
+        a rendered response, only 200 responses are cached.
+        """
+        rendered = {}
+
+        def compute():
+            response = rendered['response'] = render()
+            if response.status_code != 200:
+                return None
+            headers = {
+                header: response[header] for header in CACHED_HEADERS
+                if response.has_header(header)
+            }
+            return response.content, headers
+
+        value = self.get_or_compute(self.key(request), compute)
+        if 'response' in rendered:
+            return rendered['response']
+        content, headers = value
+        response = HttpResponse(content)
+        for header, header_value in headers.items():
+            response[header] = header_value
+        return response
+
+
+recipe_responses = ResponseCache(
+    'responses', 'recipes',
+    (RECIPES_VERSION, TAGS_VERSION, INGREDIENTS_VERSION))
@@ -5,16 +5,19 @@ Creating the necessary sterilizers..
 import logging
 import sys
 
-from django.shortcuts import get_object_or_404
 from django.core.validators import RegexValidator
+from django.db import transaction
 from djoser.serializers import UserCreateSerializer
 from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 
+from recipes.images import DEFAULT_FORMAT, IMAGE_FORMATS, variant_url
 from recipes.models import (Favorite, Ingredient, IngredientRecipe, Recipe,
-                            ShoppingCart, Subscribe, Tag)
+                            ShoppingCart, Subscribe, Tag, TagRecipe)
 from users.models import CustomUser
 
+from .fields import StreamingImageField
+
 formatter = logging.Formatter(
     '%(asctime)s %(levelname)s %(message)s - строка %(lineno)s'
 )
@@ -40,6 +43,8 @@ class CommonSubscribed(metaclass=serializers.SerializerMetaclass):
         Метод обработки параметра is_subscribed подписок.
         Method for processing the is_subscribed parameter of subscriptions.
         """
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         request = self.context.get('request')
         if request.user.is_anonymous:
             return False
@@ -60,6 +65,8 @@ class CommonRecipe(metaclass=serializers.SerializerMetaclass):
         Метод обработки параметра is_favorited избранного.
         The method of processing the is_favorite parameter of the favorites.
         """
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         request = self.context.get('request')
         if request.user.is_anonymous:
             return False
@@ -72,6 +79,8 @@ class CommonRecipe(metaclass=serializers.SerializerMetaclass):
         The method of processing the is_in_shopping_cart parameter
         in the shopping list.
         """
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         request = self.context.get('request')
         if request.user.is_anonymous:
             return False
@@ -91,7 +100,56 @@ class CommonCount(metaclass=serializers.SerializerMetaclass):
         Метод подсчета количества рецептов автора.
         The method of counting the number of recipes of the author.
         """
-        return Recipe.objects.filter(author__id=obj.id).count()
+        return obj.recipes_count
+
+
+def image_url(image, request, variant=None):
+    """
+    URL копии фотографии в формате из параметра запроса image_format,
+    без копии - URL оригинала.
+    The URL of a photo copy in the format from the image_format query
+    parameter, the original URL without a copy.
+    """
+    if not image:
+        return None
+    if variant is None:
+        url = image.url
+    else:
+        image_format = DEFAULT_FORMAT
+        if request is not None:
+            image_format = request.query_params.get(
+                'image_format', DEFAULT_FORMAT)
+        if image_format not in IMAGE_FORMATS:
+            image_format = DEFAULT_FORMAT
+        url = variant_url(image, variant, image_format)
+    if request is not None:
+        return request.build_absolute_uri(url)
+    return url
+
+
+class RecipeImageField(serializers.ImageField):
+    """
+    Поле фотографии рецепта для чтения, отдающее URL уменьшенной копии.
+    Копия задаётся параметром variant поля либо image_variant контекста
+    (без них отдаётся оригинал), формат - параметром запроса image_format.
+    A read-only recipe photo field returning the URL of a resized copy.
+    The copy is set by the field variant argument or the image_variant
+    context key (the original without them), the format by the
+    image_format query parameter.
+    """
+
+    def __init__(self, variant=None, **kwargs):
+        self.variant = variant
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        """
+        Метод получения URL копии фотографии.
+        The method of getting the photo copy URL.
+        """
+        return image_url(value, self.context.get('request'),
+                         self.variant or self.context.get('image_variant'))
 
 
 class RegistrationSerializer(UserCreateSerializer, CommonSubscribed):
@@ -216,6 +274,8 @@ class ShortRecipeSerializer(serializers.ModelSerializer):
     """
     Сериализатор для краткого отображения сведений о рецепте
     """
+    image = RecipeImageField(variant='small')
+
     class Meta:
         model = Recipe
         fields = ('id', 'name', 'image', 'cooking_time')
@@ -256,6 +316,7 @@ class RecipeSerializer(serializers.ModelSerializer,
         many=True,
         read_only=True,)
     is_in_shopping_cart = serializers.SerializerMethodField()
+    image = RecipeImageField()
 
     class Meta:
         """
@@ -281,7 +342,7 @@ class RecipeSerializerPost(serializers.ModelSerializer,
     ingredients = IngredientAmountRecipeSerializer(
         # source='ingredientamount',
         many=True)
-    image = Base64ImageField(max_length=None, use_url=False,)
+    image = StreamingImageField(max_length=None, use_url=False,)
 
     class Meta:
         """
@@ -298,46 +359,94 @@ class RecipeSerializerPost(serializers.ModelSerializer,
         Метод валидации продуктов в рецепте.
         A method for validating products in a recipe.
         """
-        ingredients_list = []
-        ingredients = value
-        for ingredient in ingredients:
+        for ingredient in value:
             if ingredient['amount'] < 1:
                 raise serializers.ValidationError(
                     'Количество должно быть равным или больше 1!')
-            id_to_check = ingredient['id']
-            ingredient_to_check = Ingredient.objects.filter(id=id_to_check)
-            if not ingredient_to_check.exists():
-                raise serializers.ValidationError(
-                    'Данного продукта нет в базе!')
-            if ingredient_to_check in ingredients_list:
-                raise serializers.ValidationError(
-                    'Данные продукты повторяются в рецепте!')
-            ingredients_list.append(ingredient_to_check)
+        ids = {ingredient['id'] for ingredient in value}
+        if len(ids) != len(value):
+            raise serializers.ValidationError(
+                'Данные продукты повторяются в рецепте!')
+        if Ingredient.objects.filter(id__in=ids).count() != len(ids):
+            raise serializers.ValidationError(
+                'Данного продукта нет в базе!')
         return value
 
     def create_ingredients(self, ingredients, recipe):
         """
-        Метод создания ингредиента
+        Метод создания продуктов рецепта одним запросом.
+        The method of creating the recipe products in one query.
         """
-
-        for ingredient in ingredients:
-            logger.debug(ingredient)
-            ingredient_object = get_object_or_404(
-                Ingredient, id=ingredient.get('id')
-            )
-            recipe.ingredients.add(
-                ingredient_object,
-                through_defaults={'amount': ingredient.get('amount')}
-            )
+        IngredientRecipe.objects.bulk_create(
+            IngredientRecipe(recipe=recipe,
+                             ingredient_id=ingredient['id'],
+                             amount=ingredient['amount'])
+            for ingredient in ingredients
+        )
         return recipe
 
     def create_tags(self, tags, recipe):
         """
-        Метод создания тега.
-        """
-        for tag in tags:
-            recipe.tags.add(tag)
+        Метод создания тегов рецепта одним запросом.
+        The method of creating the recipe tags in one query.
+        """
+        TagRecipe.objects.bulk_create(
+            TagRecipe(recipe=recipe, tags=tag) for tag in tags)
+
+    def update_tags(self, tags, recipe):
+        """
+        Метод изменения тегов рецепта: удаляются и добавляются
+        только отличающиеся теги.
+        The method of changing the recipe tags: only the differing
+        tags are deleted and added.
+        """
+        current = set(TagRecipe.objects.filter(
+            recipe=recipe).values_list('tags_id', flat=True))
+        requested = {tag.id for tag in tags}
+        if current - requested:
+            TagRecipe.objects.filter(
+                recipe=recipe, tags_id__in=current - requested).delete()
+        TagRecipe.objects.bulk_create(
+            TagRecipe(recipe=recipe, tags_id=tag_id)
+            for tag_id in requested - current)
+
+    def update_ingredients(self, ingredients, recipe):
+        """
+        Метод изменения продуктов рецепта: удаляются, добавляются
+        и обновляются только отличающиеся строки.
+        The method of changing the recipe products: only the differing
+        rows are deleted, added and updated.
+        """
+        current = {
+            row.ingredient_id: row
+            for row in IngredientRecipe.objects.filter(recipe=recipe)
+        }
+        requested = {
+            ingredient['id']: ingredient['amount']
+            for ingredient in ingredients
+        }
+        removed = current.keys() - requested.keys()
+        if removed:
+            IngredientRecipe.objects.filter(
+                recipe=recipe, ingredient_id__in=removed).delete()
+        changed = []
+        for ingredient_id, row in current.items():
+            amount = requested.get(ingredient_id)
+            if amount is not None and amount != row.amount:
+                row.amount = amount
+                changed.append(row)
+        if changed:
+            IngredientRecipe.objects.bulk_update(changed, ['amount'])
+        self.create_ingredients(
+            [
+                {'id': ingredient_id, 'amount': amount}
+                for ingredient_id, amount in requested.items()
+                if ingredient_id not in current
+            ],
+            recipe,
+        )
 
+    @transaction.atomic
     def create(self, validated_data):
         """
         Метод создания рецептов.
@@ -350,22 +459,27 @@ class RecipeSerializerPost(serializers.ModelSerializer,
         logger.debug(self.validated_data)
         ingredients = validated_data.pop('ingredients')
         recipe = Recipe.objects.create(image=image, **validated_data)
+        # The uploaded temporary file has been moved to the storage.
+        image.close()
         self.create_tags(tags, recipe)
         self.create_ingredients(ingredients, recipe)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         """
         Метод редактирования ингредиентов.
         Recipe editing ingredients.
         """
-        instance.tags.clear()
-        tags_data = validated_data.pop('tags')
-        ingredients = validated_data.pop('ingredients')
-        IngredientRecipe.objects.filter(recipe=instance).delete()
-        self.create_tags(tags_data, instance)
-        self.create_ingredients(ingredients, instance)
+        tags_data = validated_data.pop('tags', None)
+        ingredients = validated_data.pop('ingredients', None)
+        if tags_data is not None:
+            self.update_tags(tags_data, instance)
+        if ingredients is not None:
+            self.update_ingredients(ingredients, instance)
         super().update(instance, validated_data)
+        if validated_data.get('image') is not None:
+            validated_data['image'].close()
         return instance
 
 
@@ -374,7 +488,7 @@ class RecipeMinifieldSerializer(serializers.ModelSerializer):
     Сериализатор для упрощенного отображения модели рецептов.
     Sterilizer for simplified display of the recipe model.
     """
-    image = Base64ImageField()
+    image = RecipeImageField(variant='small')
 
     class Meta:
         """
@@ -411,6 +525,9 @@ class SubscriptionSerializer(serializers.ModelSerializer,
         Method of obtaining the author's recipe data,
         depending on the recipes_limit parameter.
         """
+        if hasattr(obj, 'recipes_preview'):
+            return RecipeMinifieldSerializer(
+                obj.recipes_preview, many=True, context=self.context).data
         request = self.context.get('request')
         if request.GET.get('recipes_limit'):
             recipes_limit = int(request.GET.get('recipes_limit'))
@@ -418,4 +535,5 @@ class SubscriptionSerializer(serializers.ModelSerializer,
                 :recipes_limit]
         else:
             queryset = Recipe.objects.filter(author__id=obj.id).order_by('id')
-        return RecipeMinifieldSerializer(queryset, many=True).data
+        return RecipeMinifieldSerializer(
+            queryset, many=True, context=self.context).data
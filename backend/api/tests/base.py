@@ -0,0 +1,103 @@
+"""
+Общие настройки и данные тестов API.
+Shared settings and data of the API tests.
+"""
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.catalog import ingredient_catalog, recipes_version, tag_catalog
+from api.ingredient_index import ingredient_index
+from recipes.models import Ingredient, IngredientRecipe, Recipe, Tag, TagRecipe
+from users.models import CustomUser
+
+# Caches of the test process only, emptied before every test.
+TEST_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': 'test-default'},
+    'responses': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                  'LOCATION': 'test-responses'},
+}
+
+
+@override_settings(CACHES=TEST_CACHES, DATABASE_REPLICAS=[])
+class APITestCase(TestCase):
+    """
+    Тест API с кешами процесса и временным каталогом медиафайлов.
+    An API test with the process caches and a temporary media directory.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = tempfile.mkdtemp(prefix='test-media-')
+        cls.media_settings = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media_settings.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.media_settings.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+
+    def setUp(self):
+        self.clear_caches()
+        self.anonymous = APIClient()
+
+    def clear_caches(self):
+        # The data versions restart with every test, so cached data of
+        # an earlier test would look current.
+        # caches.all() only lists the caches already used by this thread.
+        for alias in settings.CACHES:
+            caches[alias].clear()
+        for catalog in (tag_catalog, ingredient_catalog, ingredient_index,
+                        recipes_version):
+            catalog.version = None
+            catalog.invalidate()
+
+    def create_user(self, username):
+        return CustomUser.objects.create_user(
+            username=username, email=f'{username}@example.com',
+            first_name=username, last_name=username, password='Pa55word!')
+
+    def client_for(self, user):
+        client = APIClient()
+        token, _ = Token.objects.get_or_create(user=user)
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        return client
+
+    def create_recipes(self, author, count, tags=(), ingredients=()):
+        """
+        count рецептов автора с тегами и продуктами, по 10 единиц
+        каждого продукта.
+        count recipes of the author with the tags and the products, 10 of
+        every product.
+        """
+        recipes = [
+            Recipe.objects.create(
+                author=author, name=f'Рецепт {number}', text='Текст',
+                image='recipes/image/test.png', cooking_time=10)
+            for number in range(count)
+        ]
+        TagRecipe.objects.bulk_create(
+            TagRecipe(recipe=recipe, tags=tag)
+            for recipe in recipes for tag in tags)
+        IngredientRecipe.objects.bulk_create(
+            IngredientRecipe(recipe=recipe, ingredient=ingredient, amount=10)
+            for recipe in recipes for ingredient in ingredients)
+        return recipes
+
+    def create_catalog(self, tags=2, ingredients=3):
+        return (
+            [Tag.objects.create(name=f'Тег {number}', color='#FF0000',
+                                slug=f'tag{number}')
+             for number in range(tags)],
+            [Ingredient.objects.create(name=f'Продукт {number}',
+                                       measurement_unit='г')
+             for number in range(ingredients)],
+        )
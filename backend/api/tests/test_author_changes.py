@@ -0,0 +1,31 @@
+"""
+Обновление рецептов при изменении данных автора.
+Updating the recipes when the author data changes.
+"""
+from recipes.models import Recipe
+
+from .base import APITestCase
+
+
+class AuthorChangesTest(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user('author')
+        self.recipe, = self.create_recipes(self.author, 1)
+        self.updated_at = Recipe.objects.get(pk=self.recipe.pk).updated_at
+
+    def recipe_updated_at(self):
+        return Recipe.objects.get(pk=self.recipe.pk).updated_at
+
+    def test_name_change_touches_the_recipes(self):
+        self.author.first_name = 'Новое имя'
+        self.author.save()
+        self.assertGreater(self.recipe_updated_at(), self.updated_at)
+
+    def test_other_changes_leave_the_recipes(self):
+        self.author.set_password('N3w-Pa55word!')
+        self.author.save()
+        self.author.is_active = False
+        self.author.save(update_fields=['is_active'])
+        self.assertEqual(self.recipe_updated_at(), self.updated_at)
@@ -0,0 +1,34 @@
+"""
+Списки тегов и продуктов из кеша справочников.
+The tag and product lists from the catalog caches.
+"""
+from .base import APITestCase
+
+# (URL, number of rows, name of the first row)
+CATALOGS = (
+    ('/api/tags/', 2, 'Тег 0'),
+    ('/api/ingredients/', 3, 'Продукт 0'),
+)
+
+
+class CatalogListTest(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.create_catalog()
+
+    def test_json_list_is_served_with_etag(self):
+        for url, count, name in CATALOGS:
+            response = self.anonymous.get(url)
+            self.assertEqual(response['Content-Type'], 'application/json')
+            self.assertEqual(len(response.json()), count)
+            self.assertEqual(response.json()[0]['name'], name)
+            response = self.anonymous.get(
+                url, HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(response.status_code, 304)
+
+    def test_browsable_api_is_rendered_by_drf(self):
+        for url, _, name in CATALOGS:
+            response = self.anonymous.get(url, {'format': 'api'})
+            self.assertContains(response, name)
+            self.assertTrue(response['Content-Type'].startswith('text/html'))
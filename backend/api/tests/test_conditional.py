@@ -0,0 +1,147 @@
+"""
+Условные запросы списка и страницы рецепта: ответ 304 по ETag
+и Last-Modified.
+Conditional recipe list and detail requests: a 304 response by ETag
+and Last-Modified.
+"""
+from unittest import mock
+
+from django.db.models import F
+
+from recipes.models import Favorite, Recipe, Subscribe
+
+from .base import APITestCase
+
+
+def run_immediately(callback, using=None):
+    callback()
+
+
+class ConditionalRecipesTest(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user('author')
+        self.reader = self.create_user('reader')
+        tags, ingredients = self.create_catalog()
+        self.create_recipes(self.author, 5, tags, ingredients)
+        # The test photo has no file to make copies of.
+        Recipe.objects.update(image_variants_for=F('image'))
+        self.recipe = Recipe.objects.first()
+        # Test transactions never commit; the data versions that key
+        # the anonymous response cache are bumped right away.
+        patcher = mock.patch('django.db.transaction.on_commit',
+                             run_immediately)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.clients = {
+            'anonymous': self.anonymous,
+            'reader': self.client_for(self.reader),
+        }
+
+    def urls(self):
+        return (
+            '/api/recipes/',
+            '/api/recipes/?limit=2&page=2',
+            '/api/recipes/?pagination=cursor&limit=2',
+            '/api/recipes/?tags=tag0',
+            f'/api/recipes/{self.recipe.pk}/',
+        )
+
+    def get_etag(self, client, url):
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('ETag', response)
+        return response['ETag']
+
+    def assert_not_modified(self, client, url, etag):
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304, url)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+
+    def assert_modified(self, client, url, etag):
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200, url)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_unchanged_recipes_are_not_modified(self):
+        for name, client in self.clients.items():
+            for url in self.urls():
+                with self.subTest(client=name, url=url):
+                    self.assert_not_modified(
+                        client, url, self.get_etag(client, url))
+
+    def test_conditional_and_rendered_validators_agree(self):
+        # A 200 to a conditional request carries the validators of the
+        # rendered response.
+        for name, client in self.clients.items():
+            for url in self.urls():
+                with self.subTest(client=name, url=url):
+                    response = client.get(url, HTTP_IF_NONE_MATCH='W/"old"')
+                    self.assertEqual(response.status_code, 200)
+                    self.assert_not_modified(client, url, response['ETag'])
+
+    def test_next_cursor_page_is_not_modified(self):
+        client = self.clients['reader']
+        url = client.get(
+            '/api/recipes/?pagination=cursor&limit=2').json()['next']
+        self.assert_not_modified(client, url, self.get_etag(client, url))
+
+    def test_anonymous_detail_by_last_modified(self):
+        url = f'/api/recipes/{self.recipe.pk}/'
+        response = self.anonymous.get(url)
+        self.assertIn('Last-Modified', response)
+        response = self.anonymous.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_list_has_no_last_modified(self):
+        self.assertNotIn('Last-Modified', self.anonymous.get('/api/recipes/'))
+        url = f'/api/recipes/{self.recipe.pk}/'
+        self.assertNotIn('Last-Modified', self.clients['reader'].get(url))
+
+    def test_favoriting_modifies_the_viewer_representation(self):
+        client = self.clients['reader']
+        etags = {url: self.get_etag(client, url) for url in self.urls()}
+        Favorite.objects.create(user=self.reader, recipe=self.recipe)
+        for url in ('/api/recipes/', f'/api/recipes/{self.recipe.pk}/'):
+            with self.subTest(url=url):
+                self.assert_modified(client, url, etags[url])
+        # Another page does not show the recipe.
+        url = '/api/recipes/?limit=2&page=2'
+        self.assert_not_modified(client, url, etags[url])
+
+    def test_subscribing_modifies_the_viewer_representation(self):
+        client = self.clients['reader']
+        url = f'/api/recipes/{self.recipe.pk}/'
+        etag = self.get_etag(client, url)
+        Subscribe.objects.create(user=self.reader, following=self.author)
+        self.assert_modified(client, url, etag)
+
+    def test_editing_a_recipe_modifies_it(self):
+        etags = {
+            (name, url): self.get_etag(client, url)
+            for name, client in self.clients.items()
+            for url in self.urls()
+        }
+        self.recipe.name = 'Новое название'
+        self.recipe.save()
+        for name, client in self.clients.items():
+            for url in ('/api/recipes/', '/api/recipes/?tags=tag0',
+                        f'/api/recipes/{self.recipe.pk}/'):
+                with self.subTest(client=name, url=url):
+                    self.assert_modified(client, url, etags[name, url])
+
+    def test_author_rename_modifies_the_recipes(self):
+        etags = {
+            (name, url): self.get_etag(client, url)
+            for name, client in self.clients.items()
+            for url in self.urls()
+        }
+        self.author.first_name = 'Переименован'
+        self.author.save()
+        for name, client in self.clients.items():
+            for url in self.urls():
+                with self.subTest(client=name, url=url):
+                    self.assert_modified(client, url, etags[name, url])
@@ -0,0 +1,102 @@
+"""
+Денормализованные счётчики избранного, корзины, рецептов и подписчиков.
+Denormalized favorites, shopping cart, recipe and follower counters.
+"""
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+
+from recipes.models import Favorite, Recipe, ShoppingCart, Subscribe
+from users.models import CustomUser
+
+from .base import APITestCase
+
+
+class CountersTest(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user('author')
+        self.reader = self.create_user('reader')
+        self.first, self.second = self.create_recipes(self.author, 2)
+
+    def assert_counter(self, obj, field, expected):
+        obj.refresh_from_db(fields=[field])
+        self.assertEqual(getattr(obj, field), expected)
+
+    def check_recipe_counter(self, model, field):
+        row = model.objects.create(user=self.reader, recipe=self.first)
+        self.assert_counter(self.first, field, 1)
+        row.recipe = self.second
+        row.save()
+        self.assert_counter(self.first, field, 0)
+        self.assert_counter(self.second, field, 1)
+        row.delete()
+        self.assert_counter(self.second, field, 0)
+
+    def test_favorites_count(self):
+        self.check_recipe_counter(Favorite, 'favorites_count')
+
+    def test_carts_count(self):
+        self.check_recipe_counter(ShoppingCart, 'carts_count')
+
+    def test_recipes_count(self):
+        self.assert_counter(self.author, 'recipes_count', 2)
+        self.first.author = self.reader
+        self.first.save()
+        self.assert_counter(self.author, 'recipes_count', 1)
+        self.assert_counter(self.reader, 'recipes_count', 1)
+        self.first.delete()
+        self.assert_counter(self.reader, 'recipes_count', 0)
+
+    def test_recipes_count_with_update_fields(self):
+        self.first.author = self.reader
+        self.first.save(update_fields=['name'])
+        self.assert_counter(self.author, 'recipes_count', 2)
+        self.first.save(update_fields=['author'])
+        self.assert_counter(self.author, 'recipes_count', 1)
+        self.assert_counter(self.reader, 'recipes_count', 1)
+
+    def test_followers_count(self):
+        other = self.create_user('other')
+        subscription = Subscribe.objects.create(
+            user=self.reader, following=self.author)
+        self.assert_counter(self.author, 'followers_count', 1)
+        subscription.following = other
+        subscription.save()
+        self.assert_counter(self.author, 'followers_count', 0)
+        self.assert_counter(other, 'followers_count', 1)
+        subscription.delete()
+        self.assert_counter(other, 'followers_count', 0)
+
+
+class RebuildCountersTest(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user('author')
+        self.recipe, = self.create_recipes(self.author, 1)
+        # Corrupted behind the signals' back.
+        CustomUser.objects.filter(pk=self.author.pk).update(recipes_count=5)
+        Recipe.objects.filter(pk=self.recipe.pk).update(favorites_count=3)
+
+    def test_verify_reports_without_fixing(self):
+        output = StringIO()
+        with self.assertRaisesMessage(CommandError, '2 stale counters found'):
+            call_command('rebuild_counters', '--verify', stdout=output)
+        self.assertIn(
+            f'users.CustomUser.recipes_count pk={self.author.pk}: 5 != 1',
+            output.getvalue())
+        self.assertIn(
+            f'recipes.Recipe.favorites_count pk={self.recipe.pk}: 3 != 0',
+            output.getvalue())
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.recipes_count, 5)
+
+    def test_rebuild_fixes_the_counters(self):
+        call_command('rebuild_counters', stdout=StringIO())
+        self.author.refresh_from_db()
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.author.recipes_count, 1)
+        self.assertEqual(self.recipe.favorites_count, 0)
+        call_command('rebuild_counters', '--verify', stdout=StringIO())
@@ -0,0 +1,73 @@
+"""
+Чтение из реплики и закрепление клиента за основной базой на двух
+базах SQLite: реплика - копия схемы основной базы со своими строками.
+Reading from a replica and pinning a client to the primary database
+with two SQLite databases: the replica is a copy of the primary schema
+with rows of its own.
+"""
+from unittest import skipUnless
+
+from django.conf import settings
+from django.db import connections
+from django.test import override_settings
+
+from recipes.models import Favorite, Recipe
+from users.models import CustomUser
+
+from .base import APITestCase
+
+REPLICA = 'replica'
+# The replica is declared in the settings by DB_TEST_REPLICA.
+SQLITE_REPLICA = REPLICA in settings.DATABASES and all(
+    settings.DATABASES[alias]['ENGINE'].endswith('sqlite3')
+    for alias in ('default', REPLICA))
+
+
+@skipUnless(SQLITE_REPLICA, 'Needs SQLite databases default and replica.')
+@override_settings(DATABASE_REPLICAS=[REPLICA])
+class ReplicaRoutingTest(APITestCase):
+    databases = {'default', REPLICA}
+
+    @classmethod
+    def setUpClass(cls):
+        # Migrations only run on the primary, so its schema is copied
+        # before the test transactions start.
+        for alias in ('default', REPLICA):
+            connections[alias].ensure_connection()
+        connections['default'].connection.backup(
+            connections[REPLICA].connection)
+        super().setUpClass()
+
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user('author')
+        self.primary_recipe, = self.create_recipes(self.author, 1)
+        # Rows of the replica only, written without signals.
+        CustomUser.objects.using(REPLICA).bulk_create([self.author])
+        Recipe.objects.using(REPLICA).bulk_create([Recipe(
+            author=self.author, name='Рецепт реплики', text='Текст',
+            image='recipes/image/test.png', cooking_time=10)])
+        self.viewer = self.client_for(self.create_user('viewer'))
+
+    def recipe_names(self, client):
+        response = client.get('/api/recipes/')
+        self.assertEqual(response.status_code, 200)
+        return [recipe['name'] for recipe in response.json()['results']]
+
+    def test_safe_requests_read_from_the_replica(self):
+        self.assertEqual(self.recipe_names(self.anonymous),
+                         ['Рецепт реплики'])
+        self.assertEqual(self.recipe_names(self.viewer), ['Рецепт реплики'])
+
+    def test_writes_go_to_the_primary(self):
+        response = self.viewer.post(
+            f'/api/recipes/{self.primary_recipe.id}/favorite/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(Favorite.objects.using('default').exists())
+        self.assertFalse(Favorite.objects.using(REPLICA).exists())
+
+    def test_client_reads_the_primary_after_its_write(self):
+        self.viewer.post(f'/api/recipes/{self.primary_recipe.id}/favorite/')
+        self.assertEqual(self.recipe_names(self.viewer), ['Рецепт 0'])
+        self.assertEqual(self.recipe_names(self.anonymous),
+                         ['Рецепт реплики'])
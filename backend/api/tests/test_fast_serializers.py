@@ -0,0 +1,60 @@
+"""
+Совпадение быстрого представления списка рецептов с RecipeSerializer.
+The fast recipe list representation matching RecipeSerializer.
+"""
+import json
+
+from django.contrib.auth.models import AnonymousUser
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.fast_serializers import (LIST_IMAGE_VARIANT, recipe_representations,
+                                  recipe_rows)
+from api.serializers import RecipeSerializer
+from recipes.models import Favorite, Recipe, ShoppingCart, Subscribe
+
+from .base import APITestCase
+
+
+class FastRepresentationContractTest(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        tags, ingredients = self.create_catalog(tags=3, ingredients=4)
+        self.viewer = self.create_user('viewer')
+        authors = [self.create_user('author'), self.create_user('cook')]
+        recipes = []
+        for number, author in enumerate(authors):
+            recipes += self.create_recipes(
+                author, 3, tags[number:], ingredients[number:])
+        Recipe.objects.filter(pk=recipes[0].pk).update(
+            image_variants_for='recipes/image/test.png')
+        Favorite.objects.create(user=self.viewer, recipe=recipes[0])
+        ShoppingCart.objects.create(user=self.viewer, recipe=recipes[4])
+        Subscribe.objects.create(user=self.viewer, following=authors[1])
+
+    def make_request(self, user):
+        request = Request(APIRequestFactory().get(
+            '/api/recipes/', {'image_format': 'jpeg'}))
+        request.user = user
+        return request
+
+    def assert_same_json(self, user):
+        request = self.make_request(user)
+        expected = RecipeSerializer(
+            Recipe.objects.with_related(user), many=True, context={
+                'request': request, 'image_variant': LIST_IMAGE_VARIANT,
+            }).data
+        actual = recipe_representations(
+            list(recipe_rows(user)), request,
+            image_variant=LIST_IMAGE_VARIANT)
+        # JSON text is compared, so the key order is a part of the contract.
+        self.assertEqual(
+            [json.dumps(recipe, ensure_ascii=False) for recipe in actual],
+            [json.dumps(recipe, ensure_ascii=False) for recipe in expected])
+
+    def test_anonymous_representation_matches_the_serializer(self):
+        self.assert_same_json(AnonymousUser())
+
+    def test_user_representation_matches_the_serializer(self):
+        self.assert_same_json(self.viewer)
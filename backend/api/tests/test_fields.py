@@ -0,0 +1,51 @@
+"""
+Поле загрузки фотографии рецепта.
+The recipe photo upload field.
+"""
+import base64
+import os
+from io import BytesIO
+
+from django.test import SimpleTestCase, override_settings
+from PIL import Image
+from rest_framework import serializers
+
+from api.fields import StreamingImageField
+
+
+def encode_png(size, length=None):
+    buffer = BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, 'PNG')
+    return 'data:image/png;base64,' + base64.b64encode(
+        buffer.getvalue()[:length]).decode()
+
+
+class StreamingImageFieldTest(SimpleTestCase):
+
+    def decode(self, data):
+        field = StreamingImageField()
+        decode = field.decode
+        files = []
+
+        def remember(data):
+            files.append(decode(data))
+            return files[-1]
+
+        field.decode = remember
+        with self.assertRaises(serializers.ValidationError):
+            field.to_internal_value(data)
+        return files[0]
+
+    @override_settings(RECIPE_IMAGE_MAX_PIXELS=100)
+    def test_rejected_image_removes_the_temporary_file(self):
+        file = self.decode(encode_png((20, 20)))
+        self.assertFalse(os.path.exists(file.temporary_file_path()))
+
+    def test_broken_image_removes_the_temporary_file(self):
+        file = self.decode(encode_png((20, 20), length=30))
+        self.assertFalse(os.path.exists(file.temporary_file_path()))
+
+    def test_valid_image_keeps_the_temporary_file(self):
+        file = StreamingImageField().to_internal_value(encode_png((20, 20)))
+        self.addCleanup(file.close)
+        self.assertTrue(os.path.exists(file.temporary_file_path()))
@@ -0,0 +1,22 @@
+"""
+Фильтры списка рецептов.
+The recipe list filters.
+"""
+from .base import APITestCase
+
+
+class TagsFilterTest(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        tags, _ = self.create_catalog(ingredients=0)
+        author = self.create_user('author')
+        self.create_recipes(author, 2, tags[:1])
+        self.create_recipes(author, 1, tags[1:])
+
+    def test_recipes_are_filtered_by_tag_slugs(self):
+        response = self.anonymous.get('/api/recipes/?tags=tag0')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 2)
+        response = self.anonymous.get('/api/recipes/?tags=tag0&tags=tag1')
+        self.assertEqual(response.json()['count'], 3)
@@ -0,0 +1,76 @@
+"""
+Уменьшенные копии фотографий рецептов.
+Resized copies of the recipe photos.
+"""
+from io import BytesIO
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from PIL import Image
+
+from recipes.images import variant_name
+from recipes.models import Recipe
+
+from .base import APITestCase
+
+
+def run_immediately(callback, using=None):
+    callback()
+
+
+class ImageVariantsTest(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user('author')
+        # Test transactions never commit, so the hooks run right away.
+        patcher = mock.patch('django.db.transaction.on_commit',
+                             run_immediately)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def save_image(self, name):
+        buffer = BytesIO()
+        Image.new('RGB', (600, 400), 'red').save(buffer, 'PNG')
+        return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+    def create_recipe(self, image):
+        return Recipe.objects.create(
+            author=self.author, name='Рецепт', text='Текст', image=image,
+            cooking_time=10)
+
+    def test_variants_are_recorded_on_the_recipe(self):
+        image = self.save_image('recipes/image/first.png')
+        recipe = self.create_recipe(image)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.image_variants_for, image)
+        self.assertTrue(default_storage.exists(
+            variant_name(image, 'small', 'webp')))
+
+    def test_list_does_not_check_the_storage(self):
+        self.create_recipe(self.save_image('recipes/image/first.png'))
+        with mock.patch.object(FileSystemStorage, 'exists') as exists:
+            response = self.anonymous.get('/api/recipes/')
+        self.assertEqual(response.status_code, 200)
+        exists.assert_not_called()
+        image = response.json()['results'][0]['image']
+        self.assertIn('/variants/first_', image)
+
+    def test_replaced_image_variants_are_deleted(self):
+        first = self.save_image('recipes/image/first.png')
+        recipe = self.create_recipe(first)
+        second = self.save_image('recipes/image/second.png')
+        recipe.image = second
+        recipe.save()
+        self.assertFalse(default_storage.exists(
+            variant_name(first, 'small', 'webp')))
+        self.assertTrue(default_storage.exists(
+            variant_name(second, 'small', 'webp')))
+
+    def test_deleted_recipe_variants_are_deleted(self):
+        image = self.save_image('recipes/image/first.png')
+        recipe = self.create_recipe(image)
+        Recipe.objects.get(pk=recipe.pk).delete()
+        self.assertFalse(default_storage.exists(
+            variant_name(image, 'small', 'webp')))
@@ -0,0 +1,73 @@
+"""
+Курсорная пагинация ленты рецептов (?pagination=cursor).
+The cursor pagination of the recipe feed (?pagination=cursor).
+"""
+from base64 import b64encode
+from datetime import timedelta
+
+from django.utils import timezone
+
+from recipes.models import Recipe, Tag, TagRecipe
+
+from .base import APITestCase
+
+
+class KeysetPaginationTest(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user('author')
+        self.recipes = self.create_recipes(self.author, 7)
+        # Three recipes share a publication date, so only the id
+        # orders them.
+        now = timezone.now()
+        for number, recipe in enumerate(self.recipes):
+            pub_date = now - timedelta(minutes=min(number, 3))
+            Recipe.objects.filter(pk=recipe.pk).update(pub_date=pub_date)
+        self.feed = [recipe.id for recipe in Recipe.objects.order_by(
+            '-pub_date', '-id')]
+
+    def get_page(self, url):
+        response = self.anonymous.get(url)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertNotIn('count', data)
+        return data
+
+    def walk(self, url, link='next'):
+        pages = []
+        while url:
+            data = self.get_page(url)
+            pages.append([recipe['id'] for recipe in data['results']])
+            url = data[link]
+        return pages
+
+    def test_forward_walk_covers_the_feed_once(self):
+        pages = self.walk('/api/recipes/?pagination=cursor&limit=2')
+        self.assertEqual([len(page) for page in pages], [2, 2, 2, 1])
+        self.assertEqual(sum(pages, []), self.feed)
+
+    def test_backward_walk_returns_the_same_pages(self):
+        forward = self.walk('/api/recipes/?pagination=cursor&limit=2')
+        url = '/api/recipes/?pagination=cursor&limit=2'
+        for _ in forward[1:]:
+            url = self.get_page(url)['next']
+        backward = self.walk(url, link='previous')
+        self.assertEqual(backward, forward[::-1])
+
+    def test_page_boundary_under_a_filter(self):
+        tag = Tag.objects.create(name='Тег', color='#FF0000', slug='tag')
+        tagged = self.feed[1::2]
+        TagRecipe.objects.bulk_create(
+            TagRecipe(recipe_id=pk, tags=tag) for pk in tagged)
+        pages = self.walk(
+            '/api/recipes/?pagination=cursor&limit=2&tags=tag')
+        self.assertEqual(pages, [tagged[:2], tagged[2:]])
+
+    def test_invalid_cursors_are_not_found(self):
+        for cursor in ('not-base64!', b64encode(b'f|2020').decode(),
+                       b64encode(b'f|yesterday|1').decode(),
+                       b64encode(b'f|2020-01-01T00:00:00|x').decode()):
+            response = self.anonymous.get(
+                '/api/recipes/', {'pagination': 'cursor', 'cursor': cursor})
+            self.assertEqual(response.status_code, 404, cursor)
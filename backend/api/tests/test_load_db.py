@@ -0,0 +1,30 @@
+"""
+Загрузка каталога продуктов командой load_db.
+Loading the product catalog with the load_db command.
+"""
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+
+from recipes.models import Ingredient
+
+from .base import APITestCase
+
+
+class LoadDbTest(APITestCase):
+
+    def test_report_counts_inserted_rows_only(self):
+        Ingredient.objects.create(name='соль', measurement_unit='г')
+        directory = tempfile.mkdtemp(prefix='test-catalog-')
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'ingredients.csv')
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write('соль,г\nсахар,г\nмука,г\nсахар,кг\n')
+        output = StringIO()
+        call_command('load_db', path, stdout=output)
+        self.assertIn('read 4 rows: 2 ingredients inserted, 0 updated',
+                      output.getvalue())
+        self.assertEqual(Ingredient.objects.count(), 3)
@@ -0,0 +1,109 @@
+"""
+Число объектов пагинатора: пустые выборки, кеш числа по версии данных
+и оценка планировщика PostgreSQL.
+The paginator object count: empty querysets, the count cache by the data
+version and the PostgreSQL planner estimate.
+"""
+import json
+from unittest import mock
+
+from django.test import override_settings
+
+from api.catalog import recipes_version
+from foodgram.pagination import (CountProviderPaginator, estimate_count,
+                                 get_count)
+from recipes.models import DataVersion, Recipe
+from recipes.signals import RECIPES_VERSION
+
+from .base import APITestCase
+
+
+class FakeCursor:
+
+    def __init__(self, rows):
+        self.rows = list(rows)
+        self.executed = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def execute(self, sql, params=None):
+        self.executed.append(sql)
+
+    def fetchone(self):
+        return self.rows.pop(0)
+
+
+class GetCountTest(APITestCase):
+
+    def test_querysets_without_sql_count_zero(self):
+        for queryset in (Recipe.objects.none(),
+                         Recipe.objects.filter(id__in=[])):
+            with self.assertNumQueries(0):
+                self.assertEqual(get_count(queryset), (0, True))
+            paginator = CountProviderPaginator(queryset, 10)
+            self.assertEqual(list(paginator.page(1).object_list), [])
+
+    def test_count_is_cached_until_the_version_changes(self):
+        author = self.create_user('author')
+        self.create_recipes(author, 2)
+        self.assertEqual(get_count(Recipe.objects.all(), 1), (2, True))
+        self.create_recipes(author, 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_count(Recipe.objects.all(), 1), (2, True))
+        self.assertEqual(get_count(Recipe.objects.all(), 2), (3, True))
+
+    def test_recipe_list_count_follows_the_recipes_version(self):
+        author = self.create_user('author')
+        self.create_recipes(author, 2)
+        self.assertEqual(self.anonymous.get('/api/recipes/').json()['count'],
+                         2)
+        self.create_recipes(author, 1)
+        # Test transactions never commit, so the version is bumped here.
+        DataVersion.bump(RECIPES_VERSION)
+        recipes_version.invalidate()
+        response = self.client_for(author).get('/api/recipes/')
+        self.assertEqual(response.json()['count'], 3)
+
+    def test_estimate_replaces_the_count_of_large_tables(self):
+        with mock.patch('foodgram.pagination.estimate_count',
+                        return_value=150000):
+            count = get_count(Recipe.objects.all())
+            paginator = CountProviderPaginator(Recipe.objects.all(), 10)
+            self.assertFalse(paginator.count_is_exact)
+            # Pages past the estimate are not rejected.
+            self.assertEqual(paginator.validate_number(20000), 20000)
+        self.assertEqual(count, (150000, False))
+
+
+class EstimateCountTest(APITestCase):
+
+    def estimate(self, reltuples, plan_rows=None):
+        plan = json.dumps([{'Plan': {'Plan Rows': plan_rows}}])
+        cursor = FakeCursor([(reltuples,), (plan,)])
+        connection = mock.Mock(vendor='postgresql')
+        connection.cursor.return_value = cursor
+        with mock.patch('foodgram.pagination.connections',
+                        {'default': connection}):
+            return estimate_count(Recipe.objects.all()), cursor.executed
+
+    @override_settings(PAGINATION_COUNT_ESTIMATE_THRESHOLD=1000)
+    def test_large_table_uses_the_planner_rows(self):
+        estimate, executed = self.estimate(5000.0, plan_rows=4321)
+        self.assertEqual(estimate, 4321)
+        self.assertTrue(executed[1].startswith('EXPLAIN (FORMAT JSON) '))
+
+    @override_settings(PAGINATION_COUNT_ESTIMATE_THRESHOLD=1000)
+    def test_small_table_is_counted_exactly(self):
+        estimate, executed = self.estimate(999.0)
+        self.assertIsNone(estimate)
+        self.assertEqual(len(executed), 1)
+
+    @override_settings(PAGINATION_COUNT_ESTIMATE_THRESHOLD=0)
+    def test_threshold_zero_disables_estimates(self):
+        estimate, executed = self.estimate(5000.0, plan_rows=4321)
+        self.assertIsNone(estimate)
+        self.assertEqual(executed, [])
@@ -0,0 +1,72 @@
+"""
+Бюджеты SQL запросов основных страниц API.
+The SQL query budgets of the main API pages.
+"""
+import json
+import logging
+
+from django.test import override_settings
+
+from foodgram.query_stats import query_budget
+from recipes.models import Favorite, ShoppingCart, Subscribe
+
+from .base import APITestCase
+
+
+class QueryBudgetTest(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        tags, ingredients = self.create_catalog()
+        self.viewer = self.create_user('viewer')
+        self.client = self.client_for(self.viewer)
+        authors = [self.create_user(f'author{number}') for number in range(8)]
+        for author in authors:
+            recipes = self.create_recipes(author, 3, tags, ingredients)
+            Subscribe.objects.create(user=self.viewer, following=author)
+            Favorite.objects.create(user=self.viewer, recipe=recipes[0])
+            ShoppingCart.objects.create(user=self.viewer, recipe=recipes[1])
+        self.recipe = recipes[0]
+
+    def test_recipe_list(self):
+        with query_budget(8, max_repeats=1):
+            response = self.client.get('/api/recipes/?limit=20')
+        self.assertEqual(len(response.json()['results']), 20)
+
+    def test_recipe_detail(self):
+        with query_budget(6, max_repeats=1):
+            response = self.client.get(f'/api/recipes/{self.recipe.id}/')
+        self.assertTrue(response.json()['is_favorited'])
+
+    def test_subscriptions(self):
+        with query_budget(4, max_repeats=1):
+            response = self.client.get(
+                '/api/users/subscriptions/?recipes_limit=2')
+        self.assertEqual(len(response.json()['results']), 6)
+
+    def test_users(self):
+        with query_budget(3, max_repeats=1):
+            response = self.client.get('/api/users/?limit=9')
+        self.assertEqual(
+            sum(user['is_subscribed'] for user in response.json()['results']),
+            8)
+
+
+class QueryLogTest(APITestCase):
+
+    def get_log(self):
+        with self.assertLogs('foodgram.query_stats', 'DEBUG') as logs:
+            self.anonymous.get('/api/tags/')
+        record, = logs.records
+        return record.levelno, json.loads(record.getMessage())
+
+    def test_request_within_budget_is_logged_at_debug(self):
+        level, line = self.get_log()
+        self.assertEqual(level, logging.DEBUG)
+        self.assertFalse(line['over_budget'])
+
+    @override_settings(QUERY_BUDGET=0)
+    def test_request_over_budget_is_a_warning(self):
+        level, line = self.get_log()
+        self.assertEqual(level, logging.WARNING)
+        self.assertTrue(line['over_budget'])
@@ -0,0 +1,72 @@
+"""
+Проверка продуктов при создании рецепта одним запросом.
+Validating the recipe products in one query on recipe creation.
+"""
+import base64
+from io import BytesIO
+
+from PIL import Image
+
+from recipes.models import IngredientRecipe, Recipe
+
+from .base import APITestCase
+
+# Token, one product check, a query per tag (two here), savepoint, recipe,
+# author counter, tag rows, product rows, release; the response reads
+# the subscription, the products, the tags, the cart and the favorite.
+CREATE_QUERIES = 15
+
+
+def encode_png():
+    buffer = BytesIO()
+    Image.new('RGB', (20, 20), 'red').save(buffer, 'PNG')
+    return 'data:image/png;base64,' + base64.b64encode(
+        buffer.getvalue()).decode()
+
+
+class RecipeIngredientsValidationTest(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tags, self.ingredients = self.create_catalog(ingredients=8)
+        self.client = self.client_for(self.create_user('author'))
+
+    def post(self, ingredients):
+        return self.client.post('/api/recipes/', {
+            'ingredients': ingredients,
+            'tags': [tag.id for tag in self.tags],
+            'image': encode_png(),
+            'name': 'Рецепт',
+            'text': 'Текст',
+            'cooking_time': 10,
+        }, format='json')
+
+    def amounts(self, ingredients):
+        return [{'id': ingredient.id, 'amount': 5}
+                for ingredient in ingredients]
+
+    def test_queries_do_not_depend_on_the_number_of_products(self):
+        for count in (2, 8):
+            self.clear_caches()
+            with self.assertNumQueries(CREATE_QUERIES):
+                response = self.post(self.amounts(self.ingredients[:count]))
+            self.assertEqual(response.status_code, 201, response.content)
+            recipe = Recipe.objects.get(pk=response.json()['id'])
+            self.assertEqual(
+                IngredientRecipe.objects.filter(recipe=recipe).count(), count)
+
+    def test_duplicate_product_is_rejected(self):
+        response = self.post(self.amounts(
+            [self.ingredients[0], self.ingredients[1], self.ingredients[0]]))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('ingredients', response.json())
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_unknown_product_is_rejected(self):
+        ingredients = self.amounts(self.ingredients[:2])
+        ingredients.append({'id': self.ingredients[-1].id + 100,
+                            'amount': 5})
+        response = self.post(ingredients)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('ingredients', response.json())
+        self.assertFalse(Recipe.objects.exists())
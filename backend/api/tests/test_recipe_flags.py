@@ -0,0 +1,52 @@
+"""
+Флаги is_favorited и is_in_shopping_cart списка рецептов без N+1.
+The is_favorited and is_in_shopping_cart flags of the recipe list
+without N+1.
+"""
+from recipes.models import Favorite, ShoppingCart
+
+from .base import APITestCase
+
+# Versions or token, tag filter choices, recipes version for the count
+# cache, count, recipes, authors, tags, ingredients.
+LIST_QUERIES = 8
+
+
+class RecipeListFlagsTest(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        tags, ingredients = self.create_catalog()
+        self.author = self.create_user('author')
+        self.viewer = self.create_user('viewer')
+        self.recipes = self.create_recipes(
+            self.author, 10, tags, ingredients)
+        Favorite.objects.create(user=self.viewer, recipe=self.recipes[0])
+        ShoppingCart.objects.create(user=self.viewer, recipe=self.recipes[1])
+
+    def test_anonymous_list_queries_do_not_depend_on_page_size(self):
+        for limit in (2, 10):
+            self.clear_caches()
+            with self.assertNumQueries(LIST_QUERIES):
+                response = self.anonymous.get(f'/api/recipes/?limit={limit}')
+            results = response.json()['results']
+            self.assertEqual(len(results), limit)
+            for recipe in results:
+                self.assertFalse(recipe['is_favorited'])
+                self.assertFalse(recipe['is_in_shopping_cart'])
+
+    def test_user_list_queries_do_not_depend_on_page_size(self):
+        client = self.client_for(self.viewer)
+        for limit in (2, 10):
+            self.clear_caches()
+            with self.assertNumQueries(LIST_QUERIES):
+                response = client.get(f'/api/recipes/?limit={limit}')
+            self.assertEqual(len(response.json()['results']), limit)
+        flags = {
+            recipe['id']: (recipe['is_favorited'],
+                           recipe['is_in_shopping_cart'])
+            for recipe in response.json()['results']
+        }
+        self.assertEqual(flags.pop(self.recipes[0].id), (True, False))
+        self.assertEqual(flags.pop(self.recipes[1].id), (False, True))
+        self.assertEqual(set(flags.values()), {(False, False)})
@@ -0,0 +1,68 @@
+"""
+Изменение продуктов рецепта по разнице с текущими строками.
+Changing the recipe products by the difference with the current rows.
+"""
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import IngredientRecipe
+
+from .base import APITestCase
+
+TABLE = IngredientRecipe._meta.db_table
+
+
+class RecipeIngredientsUpdateTest(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        tags, self.ingredients = self.create_catalog()
+        self.author = self.create_user('author')
+        self.recipe, = self.create_recipes(
+            self.author, 1, tags, self.ingredients)
+
+    def table_queries(self, queries):
+        return [
+            query['sql'] for query in queries.captured_queries
+            if f'"{TABLE}"' in query['sql']
+            and not query['sql'].startswith('SELECT')
+        ]
+
+    def test_editing_one_amount_updates_one_row(self):
+        rows = {row.ingredient_id: row.pk for row in
+                IngredientRecipe.objects.filter(recipe=self.recipe)}
+        changed = self.ingredients[1]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client_for(self.author).patch(
+                f'/api/recipes/{self.recipe.id}/',
+                {'ingredients': [
+                    {'id': ingredient.id,
+                     'amount': 25 if ingredient == changed else 10}
+                    for ingredient in self.ingredients
+                ]},
+                format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        writes = self.table_queries(queries)
+        self.assertEqual(len(writes), 1, writes)
+        self.assertTrue(writes[0].startswith(f'UPDATE "{TABLE}"'))
+        self.assertIn(str(rows[changed.id]), writes[0])
+        self.assertEqual(
+            dict(IngredientRecipe.objects.filter(
+                recipe=self.recipe).values_list('ingredient_id', 'amount')),
+            {ingredient.id: 25 if ingredient == changed else 10
+             for ingredient in self.ingredients})
+        self.assertEqual(
+            {row.ingredient_id: row.pk for row in
+             IngredientRecipe.objects.filter(recipe=self.recipe)},
+            rows)
+
+    def test_unchanged_ingredients_are_not_written(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client_for(self.author).patch(
+                f'/api/recipes/{self.recipe.id}/',
+                {'ingredients': [
+                    {'id': ingredient.id, 'amount': 10}
+                    for ingredient in self.ingredients
+                ]},
+                format='json')
+        self.assertEqual(self.table_queries(queries), [])
@@ -0,0 +1,102 @@
+"""
+Блокировка кеша ответов и увеличение версий данных.
+The response cache lock and the data version increments.
+"""
+import os
+import shutil
+import tempfile
+import time
+
+from django.db import transaction
+from django.test import TransactionTestCase, override_settings
+
+from api.response_cache import ResponseCache
+from recipes.models import DataVersion
+from recipes.signals import RECIPES_VERSION
+
+from .base import TEST_CACHES, APITestCase
+
+
+class FileLockTest(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.mkdtemp(prefix='test-responses-')
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        caches = dict(TEST_CACHES, files={
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': directory,
+        })
+        settings = override_settings(CACHES=caches)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.responses = ResponseCache('files', 'test', (), lock_timeout=30)
+
+    def test_lock_is_exclusive_until_released(self):
+        self.assertTrue(self.responses.acquire('key:lock'))
+        self.assertFalse(self.responses.acquire('key:lock'))
+        self.responses.release('key:lock')
+        self.assertTrue(self.responses.acquire('key:lock'))
+
+    def test_stale_lock_is_taken_over(self):
+        self.assertTrue(self.responses.acquire('key:lock'))
+        expired = time.time() - 60
+        os.utime(self.responses.lock_path('key:lock'), (expired, expired))
+        self.assertTrue(self.responses.acquire('key:lock'))
+        self.assertFalse(self.responses.acquire('key:lock'))
+
+    def test_miss_waiting_for_another_process_keeps_the_stripe_free(self):
+        self.responses.wait = 0.1
+        self.assertTrue(self.responses.acquire('slow:lock'))
+        started = time.monotonic()
+        value = self.responses.get_or_compute('slow', lambda: 'computed')
+        self.assertEqual(value, 'computed')
+        self.assertGreaterEqual(time.monotonic() - started, 0.1)
+        for lock in self.responses.locks:
+            self.assertFalse(lock.locked())
+
+
+class BumpOnCommitTest(TransactionTestCase):
+
+    def bump_in_transaction(self, times):
+        before = DataVersion.get_version(RECIPES_VERSION)
+        with transaction.atomic():
+            for _ in range(times):
+                DataVersion.bump_on_commit(RECIPES_VERSION)
+            self.assertEqual(
+                DataVersion.get_version(RECIPES_VERSION), before)
+
+    def test_version_is_bumped_once_per_transaction(self):
+        self.bump_in_transaction(3)
+        self.assertEqual(DataVersion.get_version(RECIPES_VERSION), 1)
+        self.bump_in_transaction(2)
+        self.assertEqual(DataVersion.get_version(RECIPES_VERSION), 2)
+
+    def test_rolled_back_transaction_does_not_bump(self):
+        with self.assertRaises(ValueError):
+            with transaction.atomic():
+                DataVersion.bump_on_commit(RECIPES_VERSION)
+                raise ValueError
+        self.assertEqual(DataVersion.get_version(RECIPES_VERSION), 0)
+        self.bump_in_transaction(1)
+        self.assertEqual(DataVersion.get_version(RECIPES_VERSION), 1)
+
+    def test_rolled_back_savepoint_does_not_drop_the_bump(self):
+        with transaction.atomic():
+            DataVersion.bump_on_commit(RECIPES_VERSION)
+            with self.assertRaises(ValueError):
+                with transaction.atomic():
+                    DataVersion.bump_on_commit(RECIPES_VERSION)
+                    raise ValueError
+        self.assertEqual(DataVersion.get_version(RECIPES_VERSION), 1)
+        with transaction.atomic():
+            with self.assertRaises(ValueError):
+                with transaction.atomic():
+                    DataVersion.bump_on_commit(RECIPES_VERSION)
+                    raise ValueError
+            DataVersion.bump_on_commit(RECIPES_VERSION)
+        self.assertEqual(DataVersion.get_version(RECIPES_VERSION), 2)
+
+    def test_outside_a_transaction_bumps_at_once(self):
+        DataVersion.bump_on_commit(RECIPES_VERSION)
+        self.assertEqual(DataVersion.get_version(RECIPES_VERSION), 1)
@@ -0,0 +1,26 @@
+"""
+Фотография рецептов синтетического набора данных.
+The recipe photo of the synthetic dataset.
+"""
+from django.core.files.storage import default_storage
+
+from recipes.images import variant_name
+from recipes.seeding import SEED_IMAGE, DatasetBuilder
+
+from .base import APITestCase
+
+
+class SeedImageTest(APITestCase):
+
+    def test_seeded_recipes_show_the_placeholder_copies(self):
+        self.create_catalog()
+        DatasetBuilder(batch_size=10).build(users=3, recipes=4)
+        self.assertTrue(default_storage.exists(SEED_IMAGE))
+        small = variant_name(SEED_IMAGE, 'small', 'webp')
+        self.assertTrue(default_storage.exists(small))
+        response = self.anonymous.get('/api/recipes/')
+        self.assertEqual(response.status_code, 200)
+        medium = default_storage.url(
+            variant_name(SEED_IMAGE, 'medium', 'webp'))
+        for recipe in response.json()['results']:
+            self.assertTrue(recipe['image'].endswith(medium))
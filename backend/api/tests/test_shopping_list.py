@@ -0,0 +1,44 @@
+"""
+Скачивание списка покупок из кеша документов.
+Downloading the shopping list from the document cache.
+"""
+import shutil
+import tempfile
+from unittest import mock
+
+from api.document_cache import shopping_list_documents
+from recipes.models import ShoppingCart
+
+from .base import APITestCase
+
+
+class ShoppingListDownloadTest(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.mkdtemp(prefix='test-documents-')
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        patcher = mock.patch.object(
+            shopping_list_documents, 'directory', directory)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        tags, ingredients = self.create_catalog()
+        self.user = self.create_user('buyer')
+        recipe, = self.create_recipes(self.user, 1, tags, ingredients)
+        ShoppingCart.objects.create(user=self.user, recipe=recipe)
+
+    def test_unchanged_cart_is_rendered_once(self):
+        client = self.client_for(self.user)
+        with mock.patch('api.document_cache.render_shopping_list',
+                        return_value=b'%PDF-test') as render:
+            first = client.get('/api/recipes/download_shopping_cart/')
+            second = client.get('/api/recipes/download_shopping_cart/')
+        self.assertEqual(render.call_count, 1)
+        self.assertEqual(first['Content-Type'], 'application/pdf')
+        self.assertEqual(first.content, b'%PDF-test')
+        self.assertEqual(second.content, b'%PDF-test')
+
+    def test_document_is_rendered_in_the_request(self):
+        response = self.client_for(self.user).get(
+            '/api/recipes/download_shopping_cart/')
+        self.assertTrue(response.content.startswith(b'%PDF'))
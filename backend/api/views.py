@@ -4,15 +4,12 @@ Creating view classes for processing requests.
 """
 from http import HTTPStatus
 
-from django.db.models import Sum
+from django.db.models import (BooleanField, Exists, OuterRef, Prefetch,
+                              Subquery, Sum, Value)
 from django.http import HttpResponse
-from django.shortcuts import get_list_or_404, get_object_or_404
+from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfgen import canvas
 from rest_framework import permissions, status, viewsets
 from rest_framework.response import Response
 
@@ -20,7 +17,17 @@ from recipes.models import (Favorite, Ingredient, IngredientRecipe, Recipe,
                             ShoppingCart, Subscribe, Tag)
 from users.models import CustomUser
 
+from .catalog import ingredient_catalog, tag_catalog
+from .conditional import (is_conditional, not_modified_response,
+                          recipe_validators, set_validators)
+from .document_cache import get_shopping_list_pdf
+from .fast_serializers import (LIST_IMAGE_VARIANT, recipe_representations,
+                               recipe_rows)
 from .filters import IngredientSearchFilter, RecipeFilters
+from .ingredient_index import ingredient_index
+from .pagination import RecipePagination
+from .parsers import LimitedJSONParser, MultiPartJSONParser
+from .response_cache import recipe_responses
 from .serializers import (FavoriteSerializer, IngredientSerializer,
                           RecipeSerializer, RecipeSerializerPost,
                           RegistrationSerializer, ShoppingCartSerializer,
@@ -35,7 +42,19 @@ class CreateUserView(UserViewSet):
     serializer_class = RegistrationSerializer
 
     def get_queryset(self):
-        return CustomUser.objects.all()
+        """
+        Метод получения пользователей с флагом подписки текущего
+        пользователя, чтобы не проверять её на каждого.
+        The method of getting the users with the current user's
+        subscription flag, so that it is not checked for each of them.
+        """
+        user = self.request.user
+        if user.is_anonymous:
+            subscribed = Value(False, output_field=BooleanField())
+        else:
+            subscribed = Exists(Subscribe.objects.filter(
+                user=user, following=OuterRef('pk')))
+        return CustomUser.objects.annotate(is_subscribed=subscribed)
 
 
 class SubscribeViewSet(viewsets.ModelViewSet):
@@ -46,8 +65,37 @@ class SubscribeViewSet(viewsets.ModelViewSet):
     serializer_class = SubscriptionSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    def get_recipes_limit(self):
+        """
+        Метод получения параметра recipes_limit из запроса.
+        The method of getting the recipes_limit parameter from the request.
+        """
+        try:
+            return int(self.request.query_params['recipes_limit'])
+        except (KeyError, ValueError):
+            return None
+
     def get_queryset(self):
-        return get_list_or_404(CustomUser, following__user=self.request.user)
+        """
+        Метод получения авторов, на которых подписан пользователь,
+        с превью рецептов.
+        The method of getting the authors the user is subscribed to,
+        with the recipe previews.
+        """
+        recipes = Recipe.objects.order_by('id')
+        recipes_limit = self.get_recipes_limit()
+        if recipes_limit is not None:
+            first_recipes = Recipe.objects.filter(
+                author=OuterRef('author')).order_by('id').values('id')
+            recipes = recipes.filter(
+                id__in=Subquery(first_recipes[:max(recipes_limit, 0)]))
+        return CustomUser.objects.filter(
+            following__user=self.request.user
+        ).annotate(
+            is_subscribed=Value(True, output_field=BooleanField()),
+        ).prefetch_related(
+            Prefetch('recipes', queryset=recipes, to_attr='recipes_preview')
+        )
 
     def create(self, request, *args, **kwargs):
         """
@@ -82,6 +130,17 @@ class TagViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = TagSerializer
     pagination_class = None
 
+    def list(self, request, *args, **kwargs):
+        """
+        Метод получения списка тегов в JSON из кеша с поддержкой
+        If-None-Match; другие форматы отрисовывает DRF.
+        The method of getting the tag list in JSON from the cache
+        with If-None-Match support; DRF renders the other formats.
+        """
+        if request.accepted_renderer.format != 'json':
+            return super().list(request, *args, **kwargs)
+        return tag_catalog.response(request)
+
 
 class RecipeViewSet(viewsets.ModelViewSet):
     """
@@ -90,8 +149,10 @@ class RecipeViewSet(viewsets.ModelViewSet):
     """
     queryset = Recipe.objects.all()
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = RecipePagination
     filter_class = RecipeFilters
     filter_backends = [DjangoFilterBackend, ]
+    parser_classes = [LimitedJSONParser, MultiPartJSONParser]
 
     def perform_create(self, serializer):
         """
@@ -101,6 +162,93 @@ class RecipeViewSet(viewsets.ModelViewSet):
         """
         serializer.save(author=self.request.user)
 
+    def get_queryset(self):
+        """
+        Метод получения рецептов вместе со связанными объектами
+        и флагами текущего пользователя.
+        The method of getting recipes together with the related objects
+        and the flags of the current user.
+        """
+        if self.request.method in permissions.SAFE_METHODS:
+            return Recipe.objects.with_related(self.request.user)
+        return Recipe.objects.with_user_flags(self.request.user)
+
+    def cached_response(self, request, render):
+        """
+        Метод получения ответа анонимному пользователю из общего кеша;
+        render формирует ответ.
+        The method of getting a response for an anonymous user from
+        the shared cache; render builds the response.
+        """
+        if request.user.is_authenticated:
+            return render()
+        return recipe_responses.response(
+            request,
+            lambda: self.finalize_response(request, render()).render())
+
+    def get_envelope(self, data):
+        """
+        Метод получения полей ответа списка кроме самих рецептов.
+        The method of getting the list response fields except the recipes.
+        """
+        return {key: value for key, value in data.items() if key != 'results'}
+
+    def list(self, request, *args, **kwargs):
+        """
+        Метод получения списка рецептов: 304 по ETag без сериализации,
+        анонимным - из кеша, иначе - быстрым представлением без
+        сериализаторов.
+        The method of getting the recipe list: 304 by ETag without
+        serialization, from the cache for anonymous users, otherwise with
+        the fast representation without serializers.
+        """
+        if is_conditional(request):
+            paginator = self.pagination_class()
+            recipes = paginator.paginate_queryset(
+                self.filter_queryset(
+                    Recipe.objects.with_viewer_state(request.user)),
+                request, view=self)
+            response = not_modified_response(request, recipe_validators(
+                request, recipes,
+                self.get_envelope(paginator.get_paginated_response([]).data)))
+            if response is not None:
+                return response
+
+        def render():
+            recipes = self.paginate_queryset(
+                self.filter_queryset(recipe_rows(request.user)))
+            response = self.get_paginated_response(recipe_representations(
+                recipes, request, image_variant=LIST_IMAGE_VARIANT))
+            return set_validators(response, recipe_validators(
+                request, recipes, self.get_envelope(response.data)))
+
+        return self.cached_response(request, render)
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Метод получения рецепта: 304 по ETag или Last-Modified без
+        сериализации, анонимным - из кеша.
+        The method of getting a recipe: 304 by ETag or Last-Modified
+        without serialization, from the cache for anonymous users.
+        """
+        if is_conditional(request):
+            recipe = self.filter_queryset(
+                Recipe.objects.with_viewer_state(request.user)
+            ).filter(pk=self.kwargs[self.lookup_field]).first()
+            if recipe is not None:
+                response = not_modified_response(
+                    request, recipe_validators(request, [recipe]))
+                if response is not None:
+                    return response
+
+        def render():
+            recipe = self.get_object()
+            response = Response(self.get_serializer(recipe).data)
+            return set_validators(
+                response, recipe_validators(request, [recipe]))
+
+        return self.cached_response(request, render)
+
     def get_serializer_class(self):
         """
         Метод выбора сериализатора в зависимости от запроса.
@@ -124,6 +272,21 @@ class IngredientViewSet(viewsets.ModelViewSet):
     pagination_class = None
     search_fields = ['^name', ]
 
+    def list(self, request, *args, **kwargs):
+        """
+        Метод получения списка продуктов в JSON из кеша или поиска
+        по началу названия через индекс в памяти.
+        The method of getting the product list in JSON from the cache
+        or searching by the name prefix through the in-memory index.
+        """
+        search_filter = IngredientSearchFilter()
+        if search_filter.search_param not in request.query_params:
+            if request.accepted_renderer.format != 'json':
+                return super().list(request, *args, **kwargs)
+            return ingredient_catalog.response(request)
+        return Response(
+            ingredient_index.search(search_filter.get_search_terms(request)))
+
 
 class BaseFavoriteCartViewSet(viewsets.ModelViewSet):
     """
@@ -192,40 +355,11 @@ class DownloadShoppingCart(viewsets.ModelViewSet):
         Метод сохранения списка покупок в формате PDF.
         A method for saving a shopping list in PDF format.
         """
-        # Create the HttpResponse object with the appropriate PDF headers.
-        response = HttpResponse(content_type='application/pdf')
+        response = HttpResponse(
+            get_shopping_list_pdf(result), content_type='application/pdf')
         response[
             'Content-Disposition'
             ] = ('attachment; filename="somefilename.pdf"')
-        # Create the PDF object, using the response object as its "file."
-        p = canvas.Canvas(response, pagesize=A4)
-        left_position = 50
-        top_position = 700
-        # Connecting fonts from the data folder
-        pdfmetrics.registerFont(TTFont('FreeSans',
-                                       'fonts/FreeSans.ttf'))
-        p.setFont('FreeSans', 25)
-        # Draw things on the PDF. Here's where the PDF generation happens.
-        p.drawString(left_position, top_position + 40, "Список покупок:")
-
-        # Adding a shopping list from the database
-        for number, item in enumerate(result, start=1):
-            pdfmetrics.registerFont(
-                TTFont('Miama Nueva', 'fonts/Miama Nueva.ttf')
-                )
-            p.setFont('Miama Nueva', 14)
-            p.drawString(
-                left_position,
-                top_position,
-                f'{number}.  {item["ingredient__name"]} - '
-                f'{item["ingredient_total"]}'
-                f'{item["ingredient__measurement_unit"]}'
-            )
-            top_position = top_position - 40
-
-        # Close the PDF object cleanly, and we're done.
-        p.showPage()
-        p.save()
         return response
 
     def download(self, request):
@@ -0,0 +1,95 @@
+"""
+Чтение из реплик базы данных для безопасных запросов с закреплением
+клиента за основной базой после его записи.
+Reading from the database replicas for safe requests, with a client
+pinned to the primary database after its own write.
+"""
+import random
+import threading
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import caches
+
+PRIMARY = 'default'
+# Models always read from the primary: a token or a session created
+# by a login must be found by the very next request.
+PRIMARY_MODELS = ('authtoken.Token', 'sessions.Session')
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+state = threading.local()
+
+
+def pin_key(request):
+    """
+    Ключ закрепления клиента по заголовку Authorization или сессии;
+    None для анонимного клиента.
+    The client pin key by the Authorization header or the session;
+    None for an anonymous client.
+    """
+    credentials = (request.META.get('HTTP_AUTHORIZATION')
+                   or request.COOKIES.get(settings.SESSION_COOKIE_NAME))
+    if not credentials:
+        return None
+    return f'db-pin:{md5(credentials.encode()).hexdigest()}'
+
+
+class PrimaryReplicaRouter:
+    """
+    Роутер: запись и миграции - в основную базу, чтение - из случайной
+    реплики, если ReplicaMiddleware разрешил её для текущего запроса.
+    A router: writes and migrations go to the primary database, reads
+    come from a random replica when ReplicaMiddleware allowed it for
+    the current request.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not getattr(state, 'use_replica', False):
+            return PRIMARY
+        if model._meta.label in PRIMARY_MODELS:
+            return PRIMARY
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = (PRIMARY, *settings.DATABASE_REPLICAS)
+        return (obj1._state.db in databases
+                and obj2._state.db in databases)
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
+
+
+class ReplicaMiddleware:
+    """
+    Разрешает чтение из реплик безопасным запросам клиента, который
+    не писал в базу последние REPLICA_PIN_SECONDS секунд, и закрепляет
+    клиента за основной базой после успешного небезопасного запроса.
+    Allows reading from the replicas for safe requests of a client that
+    has not written to the database in the last REPLICA_PIN_SECONDS
+    seconds, and pins the client to the primary database after
+    a successful unsafe request.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+        key = pin_key(request)
+        pins = caches[settings.REPLICA_PIN_CACHE]
+        safe = request.method in SAFE_METHODS
+        state.use_replica = safe and (key is None or not pins.get(key))
+        try:
+            response = self.get_response(request)
+        finally:
+            state.use_replica = False
+        if not safe and key is not None and response.status_code < 400:
+            pins.set(key, 1, settings.REPLICA_PIN_SECONDS)
+        return response
@@ -0,0 +1,142 @@
+"""
+Подсчёт объектов выборки и пагинатор Django для API и админки.
+Counting the objects of a queryset and the Django paginator for the API
+and the admin site.
+"""
+import json
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+def estimate_count(queryset):
+    """
+    Оценка числа строк планировщиком PostgreSQL для больших таблиц.
+    Возвращает None, если оценка недоступна или таблица мала.
+    PostgreSQL planner row estimate for large tables.
+    Returns None when no estimate is available or the table is small.
+    """
+    connection = connections[queryset.db]
+    threshold = settings.PAGINATION_COUNT_ESTIMATE_THRESHOLD
+    if connection.vendor != 'postgresql' or not threshold:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+            [queryset.model._meta.db_table])
+        row = cursor.fetchone()
+        if row is None or row[0] < threshold:
+            return None
+        sql, params = queryset.query.get_compiler(
+            using=queryset.db).as_sql()
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def get_count(queryset, version=None):
+    """
+    Число объектов выборки: точное значение из кеша по сигнатуре
+    запроса и версии данных либо оценка планировщика.
+    Возвращает (число, точно ли).
+    The number of objects in the queryset: the exact value cached
+    by the query signature and the data version or the planner estimate.
+    Returns (count, is exact).
+    """
+    queryset = queryset.order_by()
+    try:
+        sql, params = queryset.query.get_compiler(using=queryset.db).as_sql()
+    except EmptyResultSet:
+        # .none() and empty IN lists compile to no query at all.
+        return 0, True
+    key = 'pagination-count:' + md5(
+        f'{queryset.db}:{version}:{sql}:{params!r}'.encode()).hexdigest()
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    estimate = estimate_count(queryset)
+    if estimate is not None:
+        result = (estimate, False)
+    else:
+        result = (queryset.count(), True)
+    cache.set(key, result, settings.PAGINATION_COUNT_CACHE_TIMEOUT)
+    return result
+
+
+class CountProviderPaginator(Paginator):
+    """
+    Пагинатор Django, получающий общее число объектов через get_count.
+    Django paginator getting the total number of objects via get_count.
+    """
+
+    def get_count_version(self):
+        """
+        Версия данных, смена которой сбрасывает кешированное число;
+        без неё число живёт PAGINATION_COUNT_CACHE_TIMEOUT секунд.
+        The data version whose change resets the cached count; without it
+        the count lives PAGINATION_COUNT_CACHE_TIMEOUT seconds.
+        """
+
+    @cached_property
+    def count_with_exactness(self):
+        """
+        Общее число объектов и признак его точности.
+        The total number of objects and whether it is exact.
+        """
+        if hasattr(self.object_list, 'query'):
+            return get_count(self.object_list, self.get_count_version())
+        return len(self.object_list), True
+
+    @cached_property
+    def count(self):
+        """
+        Общее число объектов.
+        The total number of objects.
+        """
+        return self.count_with_exactness[0]
+
+    @property
+    def count_is_exact(self):
+        """
+        Признак точности общего числа объектов.
+        Whether the total number of objects is exact.
+        """
+        return self.count_with_exactness[1]
+
+    def validate_number(self, number):
+        """
+        Метод проверки номера страницы; для оценочного числа
+        верхняя граница не проверяется.
+        The method of validating the page number; the upper bound
+        is not checked for an estimated count.
+        """
+        if self.count_is_exact:
+            return super().validate_number(number)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('That page number is not an integer')
+        if number < 1:
+            raise EmptyPage('That page number is less than 1')
+        return number
+
+    def page(self, number):
+        """
+        Метод получения страницы; для оценочного числа
+        срез не обрезается по оценке.
+        The method of getting a page; for an estimated count
+        the slice is not clipped to the estimate.
+        """
+        if self.count_is_exact:
+            return super().page(number)
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        return self._get_page(
+            self.object_list[bottom:bottom + self.per_page], number, self)
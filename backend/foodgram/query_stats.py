@@ -0,0 +1,150 @@
+"""
+Учёт SQL запросов: число, время в базе и повторяющиеся формы запросов
+на каждый запрос к серверу, поиск N+1 и проверка бюджета запросов.
+SQL query accounting: the count, the database time and the repeated
+query shapes of each request, N+1 detection and a query budget check.
+"""
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+NORMALIZERS = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'%s|\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(...)'),
+    (re.compile(r'\s+'), ' '),
+)
+
+
+def normalize(sql):
+    """
+    Форма запроса: литералы и параметры заменены на ?, списки IN
+    свёрнуты.
+    The query shape: the literals and the parameters replaced with ?,
+    the IN lists collapsed.
+    """
+    for pattern, replacement in NORMALIZERS:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+class QueryStats:
+    """
+    Обёртка выполнения запросов, собирающая их число, время и формы.
+    A query execution wrapper collecting their count, time and shapes.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.shapes[normalize(sql)] += 1
+
+    def repeated(self, threshold):
+        """
+        Формы, выполненные больше threshold раз, по убыванию числа.
+        The shapes executed more than threshold times, most frequent first.
+        """
+        return [(shape, count) for shape, count in self.shapes.most_common()
+                if count > threshold]
+
+    @contextmanager
+    def record(self):
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(
+                    connections[alias].execute_wrapper(self))
+            yield self
+
+
+class QueryStatsMiddleware:
+    """
+    Записывает запросы каждого обращения к серверу в заголовок
+    Server-Timing и строку лога JSON уровня DEBUG с повторяющимися
+    формами. Форма, повторённая больше QUERY_REPEAT_THRESHOLD раз (N+1),
+    или больше QUERY_BUDGET запросов делают строку предупреждением.
+    Records the queries of each request in the Server-Timing header
+    and a DEBUG JSON log line with the repeated shapes. A shape repeated
+    more than QUERY_REPEAT_THRESHOLD times (N+1) or more than QUERY_BUDGET
+    queries make the line a warning.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = QueryStats()
+        started = time.perf_counter()
+        with stats.record():
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+        response['Server-Timing'] = (
+            f'db;dur={stats.duration * 1000:.2f};'
+            f'desc="{stats.count} queries", '
+            f'app;dur={duration * 1000:.2f}')
+        n_plus_one = bool(stats.repeated(settings.QUERY_REPEAT_THRESHOLD))
+        over_budget = stats.count > settings.QUERY_BUDGET
+        level = logging.DEBUG
+        if n_plus_one or over_budget:
+            level = logging.WARNING
+        if not logger.isEnabledFor(level):
+            return response
+        match = request.resolver_match
+        logger.log(level, json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 2),
+            'queries': stats.count,
+            'db_ms': round(stats.duration * 1000, 2),
+            'repeated': [{'sql': shape, 'count': count}
+                         for shape, count in stats.repeated(1)],
+            'n_plus_one': n_plus_one,
+            'over_budget': over_budget,
+        }, ensure_ascii=False))
+        return response
+
+
+@contextmanager
+def query_budget(max_queries, max_repeats=None):
+    """
+    Проверка в тестах, что блок выполняет не больше max_queries запросов
+    и ни одной формы больше max_repeats раз:
+    with query_budget(5): client.get('/api/recipes/').
+    A test check that the block runs at most max_queries queries and
+    no shape more than max_repeats times:
+    with query_budget(5): client.get('/api/recipes/').
+    """
+    stats = QueryStats()
+    with stats.record():
+        yield stats
+    problems = []
+    if stats.count > max_queries:
+        problems.append(
+            f'{stats.count} queries, the budget is {max_queries}')
+    if max_repeats is not None:
+        problems.extend(
+            f'{count} times: {shape}'
+            for shape, count in stats.repeated(max_repeats))
+    if problems:
+        shapes = '\n'.join(f'{count} x {shape}'
+                           for shape, count in stats.shapes.most_common())
+        raise AssertionError(
+            '\n'.join(problems) + f'\nQueries by shape:\n{shapes}')
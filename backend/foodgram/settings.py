@@ -41,6 +41,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'foodgram.query_stats.QueryStatsMiddleware',
+    'foodgram.db_router.ReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -71,6 +73,43 @@ REST_FRAMEWORK = {
         'rest_framework.renderers.BrowsableAPIRenderer',)
 }
 
+# Seconds to cache exact paginated counts per query signature.
+PAGINATION_COUNT_CACHE_TIMEOUT = int(
+    os.getenv('PAGINATION_COUNT_CACHE_TIMEOUT', 30))
+
+# Table size (rows) above which PostgreSQL planner estimates replace
+# exact counts; 0 disables estimates.
+PAGINATION_COUNT_ESTIMATE_THRESHOLD = int(
+    os.getenv('PAGINATION_COUNT_ESTIMATE_THRESHOLD', 100000))
+
+# Seconds between checks of the tag/ingredient catalog versions in the DB
+# by the in-process caches.
+CATALOG_VERSION_CHECK_INTERVAL = float(
+    os.getenv('CATALOG_VERSION_CHECK_INTERVAL', 5))
+
+# Content-addressed cache of rendered shopping list documents.
+SHOPPING_LIST_CACHE_DIR = os.getenv(
+    'SHOPPING_LIST_CACHE_DIR',
+    os.path.join(BASE_DIR, 'cache', 'shopping_lists'))
+SHOPPING_LIST_CACHE_MAX_BYTES = int(
+    os.getenv('SHOPPING_LIST_CACHE_MAX_BYTES', 50 * 1024 * 1024))
+
+# Longest side (px) of stored recipe image originals; larger uploads
+# are downscaled.
+RECIPE_IMAGE_MAX_SIDE = int(os.getenv('RECIPE_IMAGE_MAX_SIDE', 1920))
+# Upload limits of recipe photos: decoded size in bytes and pixel count.
+RECIPE_IMAGE_MAX_BYTES = int(
+    os.getenv('RECIPE_IMAGE_MAX_BYTES', 10 * 1024 * 1024))
+RECIPE_IMAGE_MAX_PIXELS = int(
+    os.getenv('RECIPE_IMAGE_MAX_PIXELS', 40 * 1000 * 1000))
+# Resized copies of recipe images: variant name -> longest side (px).
+RECIPE_IMAGE_VARIANTS = {
+    'small': int(os.getenv('RECIPE_IMAGE_SMALL_SIDE', 200)),
+    'medium': int(os.getenv('RECIPE_IMAGE_MEDIUM_SIDE', 600)),
+}
+RECIPE_IMAGE_WEBP_QUALITY = int(os.getenv('RECIPE_IMAGE_WEBP_QUALITY', 80))
+RECIPE_IMAGE_JPEG_QUALITY = int(os.getenv('RECIPE_IMAGE_JPEG_QUALITY', 85))
+
 
 WSGI_APPLICATION = 'foodgram.wsgi.application'
 
@@ -119,6 +158,34 @@ DATABASES = {
     }
 }
 
+# Read replicas of the default database as host[:port] separated by commas;
+# safe requests read from them, see foodgram.db_router.
+DATABASE_REPLICAS = []
+for number, address in enumerate(
+        filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(',')), 1):
+    host, _, port = address.strip().partition(':')
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{number}')
+# A second SQLite database for the replica routing tests, declared with
+# DB_TEST_REPLICA=:memory: when the primary database is SQLite as well.
+if os.getenv('DB_TEST_REPLICA'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.getenv('DB_TEST_REPLICA'),
+    }
+
+DATABASE_ROUTERS = ['foodgram.db_router.PrimaryReplicaRouter']
+# Seconds a client reads from the primary after its own write, so that it
+# sees the write before the replicas catch up; the pins are kept in a cache
+# shared by the workers.
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', 5))
+REPLICA_PIN_CACHE = os.getenv('REPLICA_PIN_CACHE', 'responses')
+
 
 # DATABASES = {
 #     'default': {
@@ -127,6 +194,47 @@ DATABASES = {
 #     }
 # }
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Rendered anonymous recipe responses shared by all workers on the host.
+    'responses': {
+        'BACKEND': os.getenv(
+            'RESPONSE_CACHE_BACKEND',
+            'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.getenv(
+            'RESPONSE_CACHE_LOCATION',
+            os.path.join(BASE_DIR, 'cache', 'responses')),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+# Seconds a cached anonymous recipe response lives; writes to recipes
+# invalidate it earlier through the data versions.
+RESPONSE_CACHE_TIMEOUT = int(os.getenv('RESPONSE_CACHE_TIMEOUT', 300))
+
+# A request running the same query shape more times than this is logged
+# as an N+1 warning by foodgram.query_stats.
+QUERY_REPEAT_THRESHOLD = int(os.getenv('QUERY_REPEAT_THRESHOLD', 5))
+# A request running more queries than this is logged as a warning too;
+# the other requests are logged at DEBUG.
+QUERY_BUDGET = int(os.getenv('QUERY_BUDGET', 20))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'foodgram.query_stats': {
+            'handlers': ['console'],
+            'level': os.getenv('QUERY_LOG_LEVEL', 'WARNING'),
+            'propagate': False,
+        },
+    },
+}
+
 AUTH_USER_MODEL = 'users.CustomUser'
 
 
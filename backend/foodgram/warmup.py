@@ -0,0 +1,60 @@
+"""
+Прогрев приложения в мастер-процессе gunicorn до запуска рабочих
+процессов: загруженное здесь делится между ними копированием при записи.
+Warming up the application in the gunicorn master process before the
+workers start: what is loaded here is shared with them copy-on-write.
+"""
+import logging
+import time
+
+from django.db import DatabaseError, connections
+from django.urls import get_resolver, reverse
+
+from api.catalog import ingredient_catalog, tag_catalog
+from api.ingredient_index import ingredient_index
+from api.pdf import register_fonts
+
+logger = logging.getLogger(__name__)
+
+
+def load_urls():
+    # Resolving imports every view; reversing builds the lookup tables.
+    get_resolver().resolve('/api/')
+    reverse('api:recipes-list')
+
+
+def load_catalogs():
+    for cache in (tag_catalog, ingredient_catalog, ingredient_index):
+        cache.refresh()
+
+
+STEPS = (
+    ('fonts', register_fonts),
+    ('urls', load_urls),
+    ('catalogs', load_catalogs),
+)
+
+
+def warm_up():
+    """
+    Выполнение шагов прогрева; возвращает время каждого шага
+    в секундах. Недоступная БД не мешает запуску: справочники тогда
+    загрузят рабочие процессы при первом запросе. Соединения с БД
+    закрываются, чтобы рабочие процессы не унаследовали их.
+    Running the warm-up steps; returns the time of every step in
+    seconds. An unavailable DB does not prevent the start: the workers
+    then load the catalogs on the first request. The DB connections are
+    closed so that the workers do not inherit them.
+    """
+    timings = {}
+    try:
+        for name, step in STEPS:
+            started = time.perf_counter()
+            try:
+                step()
+            except DatabaseError as error:
+                logger.warning('Warm-up step %s skipped: %s', name, error)
+            timings[name] = time.perf_counter() - started
+    finally:
+        connections.close_all()
+    return timings
@@ -0,0 +1,63 @@
+"""
+Настройки gunicorn: число процессов и потоков по числу процессоров
+и переменным окружения, предзагрузка и прогрев приложения в мастер-процессе.
+Gunicorn settings: the number of workers and threads by the CPU count
+and the environment, the application preloaded and warmed up in the
+master process.
+"""
+import gc
+import os
+import time
+
+STARTED = time.monotonic()
+
+
+def cpu_count():
+    # The CPUs available to the process, e.g. limited by a container.
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.getenv('GUNICORN_WORKERS', cpu_count() * 2 + 1))
+threads = int(os.getenv('GUNICORN_THREADS', 2))
+worker_class = 'gthread' if threads > 1 else 'sync'
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+# Restarting a worker now and then returns the memory it has grown by;
+# the jitter keeps the workers from restarting all at once.
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 200))
+# Django, DRF and reportlab are imported once in the master and shared
+# with the workers copy-on-write.
+preload_app = True
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+
+
+def when_ready(server):
+    """
+    Прогрев в мастер-процессе перед запуском рабочих процессов и отчёт
+    о времени запуска.
+    Warming up in the master process before the workers start and
+    reporting the startup time.
+    """
+    loaded = time.monotonic() - STARTED
+    from foodgram.warmup import warm_up
+    timings = warm_up()
+    # Objects that survive the warm-up are never collected, so the
+    # collector does not write to their pages and unshare them.
+    gc.freeze()
+    server.log.info(
+        'Startup: application loaded in %.2fs, warm-up %s, ready in %.2fs '
+        'with %s workers x %s threads',
+        loaded,
+        ', '.join(f'{name} {seconds:.2f}s'
+                  for name, seconds in timings.items()),
+        time.monotonic() - STARTED, server.num_workers, threads)
+
+
+def post_worker_init(worker):
+    worker.log.info('Worker %s ready %.2fs after the master started',
+                    worker.pid, time.monotonic() - STARTED)
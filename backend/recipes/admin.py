@@ -1,9 +1,100 @@
 from django.contrib import admin
+from django.db.models import Q
+
+from foodgram.pagination import CountProviderPaginator
 
 from .models import (Favorite, Ingredient, IngredientRecipe, Recipe,
                      ShoppingCart, Subscribe, Tag, TagRecipe)
 
 
+class InputFilter(admin.SimpleListFilter):
+    """
+    Фильтр с полем ввода вместо списка всех значений; значение
+    сравнивается на точное совпадение с полями lookup_fields
+    (по индексу).
+    A filter with an input box instead of the list of all values;
+    the value is matched exactly against the lookup_fields
+    (using an index).
+    """
+    template = 'admin/input_filter.html'
+    lookup_fields = ()
+    placeholder = ''
+
+    def lookups(self, request, model_admin):
+        """
+        Метод с единственным пустым вариантом, чтобы фильтр отображался.
+        The method with a single empty choice so that the filter is shown.
+        """
+        return ((None, None),)
+
+    def choices(self, changelist):
+        """
+        Метод варианта «Все» с параметрами остальных фильтров
+        для скрытых полей формы.
+        The method of the "All" choice with the parameters of the other
+        filters for the hidden form fields.
+        """
+        all_choice = next(super().choices(changelist))
+        all_choice['query_parts'] = [
+            (key, value)
+            for key, value in changelist.get_filters_params().items()
+            if key != self.parameter_name
+        ]
+        yield all_choice
+
+    def queryset(self, request, queryset):
+        value = (self.value() or '').strip()
+        if not value:
+            return queryset
+        query = Q()
+        for field in self.lookup_fields:
+            query |= Q(**{field: value})
+        return queryset.filter(query)
+
+
+class UserFilter(InputFilter):
+    title = 'пользователю'
+    parameter_name = 'user'
+    lookup_fields = ('user__username', 'user__email')
+    placeholder = 'Юзернейм или email'
+
+
+class AuthorFilter(InputFilter):
+    title = 'автору'
+    parameter_name = 'author'
+    lookup_fields = ('author__username', 'author__email')
+    placeholder = 'Юзернейм или email'
+
+
+class FollowingFilter(AuthorFilter):
+    parameter_name = 'following'
+    lookup_fields = ('following__username', 'following__email')
+
+
+class RecipeFilter(InputFilter):
+    title = 'рецепту'
+    parameter_name = 'recipe'
+    placeholder = 'Номер рецепта'
+
+    def queryset(self, request, queryset):
+        value = (self.value() or '').strip()
+        if not value.isdigit():
+            return queryset
+        return queryset.filter(recipe_id=int(value))
+
+
+class ScalableAdmin(admin.ModelAdmin):
+    """
+    Базовые параметры админ зоны для больших таблиц: приблизительный
+    подсчёт строк без полного подсчёта таблицы.
+    Base admin parameters for large tables: approximate row counts
+    without counting the whole table.
+    """
+    paginator = CountProviderPaginator
+    show_full_result_count = False
+    empty_value_display = '-пусто-'
+
+
 class IngredientRecipeInline(admin.TabularInline):
     """
     Параметры настроек админ зоны
@@ -12,6 +103,11 @@ class IngredientRecipeInline(admin.TabularInline):
 
     model = IngredientRecipe
     extra = 0
+    autocomplete_fields = ('ingredient',)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(
+            'ingredient', 'recipe')
 
 
 class TagRecipeInline(admin.TabularInline):
@@ -22,15 +118,16 @@ class TagRecipeInline(admin.TabularInline):
     model = TagRecipe
     extra = 0
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('tags', 'recipe')
 
-class IngredientAdmin(admin.ModelAdmin):
+
+class IngredientAdmin(ScalableAdmin):
     """
     Параметры админ зоны продуктов.
     """
     list_display = ('name', 'measurement_unit')
-    search_fields = ('name', )
-    empty_value_display = '-пусто-'
-    list_filter = ('name',)
+    search_fields = ('^name', )
 
 
 class TageAdmin(admin.ModelAdmin):
@@ -44,17 +141,17 @@ class TageAdmin(admin.ModelAdmin):
     search_fields = ('name', )
 
 
-class FavoriteAdmin(admin.ModelAdmin):
+class FavoriteAdmin(ScalableAdmin):
     """
     Параметры админ зоны избранных рецептов.
     """
     list_display = ('user', 'recipe')
-    search_fields = ('user', )
-    empty_value_display = '-пусто-'
-    list_filter = ('user',)
+    list_select_related = ('user', 'recipe')
+    autocomplete_fields = ('user', 'recipe')
+    list_filter = (UserFilter, RecipeFilter)
 
 
-class RecipeAdmin(admin.ModelAdmin):
+class RecipeAdmin(ScalableAdmin):
     """
     Параметры админ зоны рецептов.
     """
@@ -62,34 +159,36 @@ class RecipeAdmin(admin.ModelAdmin):
 
     list_display = ('name', 'author', 'cooking_time',
                     'id', 'count_favorite', 'pub_date')
-    # search_fields = ('name', 'author', 'tags')
-    empty_value_display = '-пусто-'
-    list_filter = ('name', 'author', 'tags')
+    list_select_related = ('author',)
+    search_fields = ('^name',)
+    autocomplete_fields = ('author',)
+    list_filter = (AuthorFilter, 'tags')
 
     def count_favorite(self, obj):
         """
         Метод для подсчета общего числа
         добавлений этого рецепта в избранное.
         """
-        return Favorite.objects.filter(recipe=obj).count()
+        return obj.favorites_count
     count_favorite.short_description = 'Число добавлении в избранное'
+    count_favorite.admin_order_field = 'favorites_count'
 
 
-class ShoppingCartAdmin(admin.ModelAdmin):
+class ShoppingCartAdmin(ScalableAdmin):
     """
     Параметры админ зоны списка покупок.
     """
-    list_filter = ('recipe',)
+    list_filter = (UserFilter, RecipeFilter)
     list_display = ('user', 'recipe')
-    empty_value_display = '-пусто-'
-    search_fields = ('recipe', )
+    list_select_related = ('user', 'recipe')
+    autocomplete_fields = ('user', 'recipe')
 
 
-class SubscribeAdmin(admin.ModelAdmin):
+class SubscribeAdmin(ScalableAdmin):
     list_display = ('user', 'following')
-    search_fields = ('user', )
-    list_filter = ('user',)
-    empty_value_display = '-пусто-'
+    list_select_related = ('user', 'following')
+    autocomplete_fields = ('user', 'following')
+    list_filter = (UserFilter, FollowingFilter)
 
 
 admin.site.register(Ingredient, IngredientAdmin)
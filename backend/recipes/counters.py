@@ -0,0 +1,69 @@
+"""
+Денормализованные счётчики рецептов и пользователей.
+Denormalized recipe and user counters.
+"""
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from users.models import CustomUser
+
+from .models import Favorite, Recipe, ShoppingCart, Subscribe
+
+# (model, counter field, counted model, foreign key of the counted model)
+COUNTERS = (
+    (Recipe, 'favorites_count', Favorite, 'recipe'),
+    (Recipe, 'carts_count', ShoppingCart, 'recipe'),
+    (CustomUser, 'recipes_count', Recipe, 'author'),
+    (CustomUser, 'followers_count', Subscribe, 'following'),
+)
+
+
+def increment(model, pk, field, delta):
+    """
+    Атомарное изменение счётчика на delta выражением F(); счётчик
+    не опускается ниже нуля.
+    Atomically changing a counter by delta with an F() expression;
+    the counter does not go below zero.
+    """
+    queryset = model.objects.filter(pk=pk)
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    queryset.update(**{field: F(field) + delta})
+
+
+def actual_count(counted_model, foreign_key):
+    """
+    Подзапрос фактического числа связанных строк для счётчика.
+    A subquery of the actual number of related rows for a counter.
+    """
+    return Coalesce(Subquery(
+        counted_model.objects.filter(
+            **{foreign_key: OuterRef('pk')}
+        ).order_by().values(foreign_key).annotate(
+            total=Count('pk')
+        ).values('total')
+    ), 0)
+
+
+def stale_counters(model, field, counted_model, foreign_key):
+    """
+    Строки, в которых счётчик расходится с фактическим числом.
+    Rows where the counter differs from the actual number.
+    """
+    return model.objects.annotate(
+        actual=actual_count(counted_model, foreign_key)
+    ).exclude(**{field: F('actual')})
+
+
+def fill_counters(queryset):
+    """
+    Запись фактических чисел в счётчики строк queryset; нужна после
+    bulk_create, который не вызывает сигналы.
+    Writing the actual numbers to the counters of the queryset rows;
+    needed after bulk_create, which does not send signals.
+    """
+    queryset.update(**{
+        field: actual_count(counted_model, foreign_key)
+        for model, field, counted_model, foreign_key in COUNTERS
+        if model is queryset.model
+    })
@@ -0,0 +1,129 @@
+"""
+Обработка фотографий рецептов: уменьшение оригиналов и создание
+уменьшенных копий в форматах WebP и JPEG.
+Processing recipe photos: downscaling originals and creating
+resized copies in the WebP and JPEG formats.
+"""
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+VARIANTS_DIR = 'variants'
+IMAGE_FORMATS = ('webp', 'jpeg')
+DEFAULT_FORMAT = 'webp'
+EXIF_ORIENTATION = 0x0112
+
+
+def variant_name(name, variant, image_format):
+    """
+    Имя файла копии рецепта: recipes/image/variants/<имя>_<копия>.<формат>.
+    The file name of a copy: recipes/image/variants/<name>_<variant>.<format>.
+    """
+    directory, filename = os.path.split(name)
+    stem = os.path.splitext(filename)[0]
+    return os.path.join(
+        directory, VARIANTS_DIR, f'{stem}_{variant}.{image_format}')
+
+
+def encode(image, image_format):
+    """
+    Кодирование изображения в WebP или JPEG; прозрачность для JPEG
+    заменяется белым фоном.
+    Encoding an image to WebP or JPEG; transparency is replaced
+    with a white background for JPEG.
+    """
+    if image_format == 'jpeg' and image.mode != 'RGB':
+        background = Image.new('RGB', image.size, 'white')
+        if image.mode in ('RGBA', 'LA', 'P'):
+            image = image.convert('RGBA')
+            background.paste(image, mask=image.getchannel('A'))
+        else:
+            background.paste(image.convert('RGB'))
+        image = background
+    elif image_format == 'webp' and image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+    buffer = BytesIO()
+    if image_format == 'jpeg':
+        image.save(buffer, 'JPEG', optimize=True, progressive=True,
+                   quality=settings.RECIPE_IMAGE_JPEG_QUALITY)
+    else:
+        image.save(buffer, 'WEBP', method=4,
+                   quality=settings.RECIPE_IMAGE_WEBP_QUALITY)
+    return buffer.getvalue()
+
+
+def replace(storage, name, content):
+    """
+    Запись файла под заданным именем с заменой существующего.
+    Writing a file under the given name replacing an existing one.
+    """
+    if storage.exists(name):
+        storage.delete(name)
+    storage.save(name, ContentFile(content))
+
+
+def process_recipe_image(image):
+    """
+    Уменьшение оригинала больше RECIPE_IMAGE_MAX_SIDE и создание копий
+    RECIPE_IMAGE_VARIANTS во всех форматах.
+    Downscaling an original larger than RECIPE_IMAGE_MAX_SIDE and creating
+    the RECIPE_IMAGE_VARIANTS copies in all formats.
+    """
+    storage = image.storage
+    with storage.open(image.name, 'rb') as file:
+        source = Image.open(file)
+        original_format = source.format
+        source.load()
+    rotated = source.getexif().get(EXIF_ORIENTATION, 1) != 1
+    oriented = ImageOps.exif_transpose(source)
+    max_side = settings.RECIPE_IMAGE_MAX_SIDE
+    if rotated or max(source.size) > max_side:
+        oriented.thumbnail((max_side, max_side), Image.LANCZOS)
+        buffer = BytesIO()
+        if original_format == 'JPEG':
+            oriented.save(buffer, 'JPEG', optimize=True,
+                          quality=settings.RECIPE_IMAGE_JPEG_QUALITY)
+        else:
+            oriented.save(buffer, original_format or 'PNG')
+        replace(storage, image.name, buffer.getvalue())
+    for variant, side in settings.RECIPE_IMAGE_VARIANTS.items():
+        resized = oriented.copy()
+        resized.thumbnail((side, side), Image.LANCZOS)
+        for image_format in IMAGE_FORMATS:
+            replace(storage, variant_name(image.name, variant, image_format),
+                    encode(resized, image_format))
+
+
+def has_variants(image):
+    """
+    Проверка по отметке рецепта, созданы ли копии текущей фотографии,
+    без обращения к хранилищу.
+    Checking by the recipe mark whether the copies of the current photo
+    exist, without accessing the storage.
+    """
+    return bool(image) and (
+        getattr(image.instance, 'image_variants_for', '') == image.name)
+
+
+def delete_variants(storage, name):
+    """
+    Удаление копий фотографии name.
+    Deleting the copies of the name photo.
+    """
+    for variant in settings.RECIPE_IMAGE_VARIANTS:
+        for image_format in IMAGE_FORMATS:
+            storage.delete(variant_name(name, variant, image_format))
+
+
+def variant_url(image, variant, image_format=DEFAULT_FORMAT):
+    """
+    URL копии фотографии либо оригинала, если копии не созданы.
+    The URL of a photo copy, or of the original if the copies are missing.
+    """
+    if variant in settings.RECIPE_IMAGE_VARIANTS and has_variants(image):
+        return image.storage.url(
+            variant_name(image.name, variant, image_format))
+    return image.url
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from recipes.images import has_variants, process_recipe_image
+from recipes.models import DataVersion, Recipe
+from recipes.signals import RECIPES_VERSION
+
+
+class Command(BaseCommand):
+    help = ('Downscales oversized recipe photos and creates their resized '
+            'WebP and JPEG copies for recipes that do not have them yet')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Recreate the copies of every recipe photo.')
+
+    def handle(self, *args, **options):
+        processed = failed = 0
+        recipes = Recipe.objects.exclude(image='').only(
+            'id', 'image', 'image_variants_for')
+        for recipe in recipes.iterator():
+            if not options['force'] and has_variants(recipe.image):
+                continue
+            try:
+                process_recipe_image(recipe.image)
+            except (OSError, ValueError) as error:
+                failed += 1
+                self.stderr.write(f'Recipe {recipe.id}: {error}')
+                continue
+            Recipe.objects.filter(pk=recipe.pk).update(
+                image_variants_for=recipe.image.name,
+                updated_at=timezone.now())
+            processed += 1
+        if processed:
+            DataVersion.bump(RECIPES_VERSION)
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed {processed} photos, {failed} failed'))
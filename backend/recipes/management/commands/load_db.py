@@ -1,19 +1,184 @@
 import csv
+import io
+import json
+import os
+import time
+from itertools import islice
 
-from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
 
-from recipes.models import Ingredient
+from recipes.models import DataVersion, Ingredient, Recipe
+from recipes.signals import INGREDIENTS_VERSION, RECIPES_VERSION
+
+FORMATS = ('csv', 'json', 'ndjson')
+
+
+def read_csv(file):
+    for row in csv.reader(file):
+        if row:
+            yield row[0], row[1]
+
+
+def read_ndjson(file):
+    for line in file:
+        if line.strip():
+            item = json.loads(line)
+            yield item['name'], item['measurement_unit']
+
+
+def read_json(file, chunk_size=1 << 16):
+    """
+    Потоковое чтение JSON массива объектов без загрузки файла целиком.
+    Streaming read of a JSON array of objects without loading
+    the whole file.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    started = False
+    for chunk in iter(lambda: file.read(chunk_size), ''):
+        buffer += chunk
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                position += 1
+            if not started and buffer[position:position + 1] == '[':
+                started = True
+                position += 1
+                continue
+            if buffer[position:position + 1] in ('', ']'):
+                break
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                break
+            yield item['name'], item['measurement_unit']
+        buffer = buffer[position:]
+    if buffer.strip() not in ('', ']'):
+        raise ValueError(f'Malformed JSON near {buffer[:50]!r}')
+
+
+READERS = {'csv': read_csv, 'json': read_json, 'ndjson': read_ndjson}
 
 
 class Command(BaseCommand):
-    help = 'Loads ingredients from a csv file'
+    help = ('Loads ingredients from a CSV, JSON or NDJSON file in batches, '
+            'inserting new ones and skipping or updating existing ones')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?',
+            default=os.path.join(
+                settings.BASE_DIR, 'recipes', 'data', 'ingredients.csv'),
+            help='Catalog file (default: recipes/data/ingredients.csv).')
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help='File format; guessed from the extension by default.')
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Rows per insert batch.')
+        parser.add_argument(
+            '--update', action='store_true',
+            help='Update the measurement unit of existing ingredients '
+                 '(PostgreSQL only; other databases skip existing ones).')
+        parser.add_argument(
+            '--copy', action='store_true',
+            help='Use COPY into a staging table and a single merge '
+                 '(PostgreSQL only).')
 
     def handle(self, *args, **options):
-        with open('recipes/data/ingredients.csv', encoding='utf-8') as f:
-            reader = csv.reader(f)
-            for row in reader:
-                name, unit = row
-                Ingredient.objects.get_or_create(
-                    name=name, measurement_unit=unit)
+        path = options['path']
+        file_format = options['format'] or os.path.splitext(
+            path)[1].lstrip('.').lower()
+        if file_format not in FORMATS:
+            raise CommandError(
+                f'Unknown format {file_format!r}, use --format')
+        use_copy = options['copy'] or options['update']
+        if use_copy and connection.vendor != 'postgresql':
+            raise CommandError('--copy and --update require PostgreSQL')
+
+        self.started = time.perf_counter()
+        self.loaded = self.updated = 0
+        with open(path, encoding='utf-8') as file, transaction.atomic():
+            existing = Ingredient.objects.count()
+            rows = READERS[file_format](file)
+            if use_copy:
+                self.copy(rows, options['batch_size'], options['update'])
+            else:
+                self.bulk_create(rows, options['batch_size'])
+            # Duplicates and existing names are skipped by the inserts.
+            inserted = Ingredient.objects.count() - existing
+            if inserted or self.updated:
+                DataVersion.bump(INGREDIENTS_VERSION)
+        self.stdout.write(self.style.SUCCESS(
+            f'Successfully read {self.loaded} rows: {inserted} ingredients '
+            f'inserted, {self.updated} updated '
+            f'in {time.perf_counter() - self.started:.1f}s'))
+
+    def batches(self, rows, batch_size):
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                return
+            yield batch
+            self.loaded += len(batch)
+            elapsed = time.perf_counter() - self.started
+            self.stdout.write(
+                f'{self.loaded} rows, '
+                f'{self.loaded / max(elapsed, 1e-9):.0f} rows/s')
+
+    def bulk_create(self, rows, batch_size):
+        for batch in self.batches(rows, batch_size):
+            Ingredient.objects.bulk_create(
+                (Ingredient(name=name.strip(), measurement_unit=unit.strip())
+                 for name, unit in batch),
+                batch_size=500,
+                ignore_conflicts=True,
+            )
+
+    def copy(self, rows, batch_size, update):
+        table = Ingredient._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE TEMPORARY TABLE ingredient_staging '
+                '(name text, measurement_unit text) ON COMMIT DROP')
+            for batch in self.batches(rows, batch_size):
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerows(
+                    (name.strip(), unit.strip()) for name, unit in batch)
+                buffer.seek(0)
+                cursor.copy_expert(
+                    'COPY ingredient_staging FROM STDIN WITH (FORMAT csv)',
+                    buffer)
+            if update:
+                cursor.execute(
+                    f'UPDATE {table} AS ingredient '
+                    'SET measurement_unit = staged.measurement_unit '
+                    'FROM (SELECT DISTINCT ON (name) name, measurement_unit '
+                    'FROM ingredient_staging) AS staged '
+                    'WHERE ingredient.name = staged.name '
+                    'AND ingredient.measurement_unit '
+                    '<> staged.measurement_unit '
+                    'RETURNING ingredient.id')
+                updated = [row[0] for row in cursor.fetchall()]
+                self.updated = len(updated)
+                self.touch_recipes(updated)
+            cursor.execute(
+                f'INSERT INTO {table} (name, measurement_unit) '
+                'SELECT DISTINCT ON (name) name, measurement_unit '
+                'FROM ingredient_staging ON CONFLICT (name) DO NOTHING')
+
+    def touch_recipes(self, ingredient_ids):
+        # The units are part of the recipe representation, so the recipe
+        # validators and cached responses must change with them.
+        if not ingredient_ids:
+            return
+        touched = Recipe.objects.filter(
+            ingredients__in=ingredient_ids).update(updated_at=timezone.now())
+        if touched:
+            DataVersion.bump(RECIPES_VERSION)
         self.stdout.write(
-            self.style.SUCCESS('Successfully loaded ingredients'))
+            f'{len(ingredient_ids)} units changed, {touched} recipes touched')
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from recipes.counters import COUNTERS, stale_counters
+
+
+class Command(BaseCommand):
+    help = ('Recounts the denormalized favorites, shopping cart, recipe and '
+            'follower counters and fixes the ones that drifted')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify', action='store_true',
+            help='Only report stale counters and exit with an error '
+                 'if there are any.')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Rows per update batch.')
+
+    def handle(self, *args, **options):
+        total = 0
+        for model, field, counted_model, foreign_key in COUNTERS:
+            with transaction.atomic():
+                stale = list(stale_counters(
+                    model, field, counted_model, foreign_key
+                ).select_for_update().only('pk', field))
+                label = f'{model._meta.label}.{field}'
+                for row in stale[:10]:
+                    self.stdout.write(
+                        f'{label} pk={row.pk}: '
+                        f'{getattr(row, field)} != {row.actual}')
+                if not options['verify'] and stale:
+                    for row in stale:
+                        setattr(row, field, row.actual)
+                    model.objects.bulk_update(
+                        stale, [field], batch_size=options['batch_size'])
+            self.stdout.write(f'{label}: {len(stale)} stale')
+            total += len(stale)
+        if options['verify'] and total:
+            raise CommandError(f'{total} stale counters found')
+        action = 'found' if options['verify'] else 'fixed'
+        self.stdout.write(
+            self.style.SUCCESS(f'{total} stale counters {action}'))
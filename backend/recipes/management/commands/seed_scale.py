@@ -0,0 +1,60 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from recipes.seeding import CATALOG_PATH, DatasetBuilder
+
+
+class Command(BaseCommand):
+    help = ('Generates a large synthetic dataset with power law author, '
+            'recipe and product popularity and a realistic tag mix, '
+            'written with batched bulk_create or PostgreSQL COPY')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--recipes', type=int, default=100000)
+        parser.add_argument('--ingredients-per-recipe', type=int, default=8)
+        parser.add_argument(
+            '--favorites', type=int, default=20,
+            help='Mean favorites per user.')
+        parser.add_argument(
+            '--carts', type=int, default=5,
+            help='Mean shopping cart recipes per user.')
+        parser.add_argument(
+            '--subscriptions', type=int, default=10,
+            help='Mean subscriptions per user.')
+        parser.add_argument(
+            '--alpha', type=float, default=1.0,
+            help='Power law exponent of the popularity and activity.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--catalog', default=CATALOG_PATH,
+            help='Products CSV loaded when the catalog is empty '
+                 '(default: recipes/data/ingredients.csv).')
+        parser.add_argument(
+            '--batch-size', type=int, default=10000,
+            help='Rows per insert batch.')
+        parser.add_argument(
+            '--copy', action='store_true',
+            help='Write with COPY instead of bulk_create (PostgreSQL only).')
+
+    def handle(self, *args, **options):
+        if options['copy'] and connection.vendor != 'postgresql':
+            raise CommandError('--copy requires PostgreSQL')
+        started = time.perf_counter()
+        inserted = DatasetBuilder(
+            seed=options['seed'], batch_size=options['batch_size'],
+            use_copy=options['copy'], alpha=options['alpha'],
+            report=self.stdout.write,
+        ).build(
+            users=options['users'], recipes=options['recipes'],
+            ingredients_per_recipe=options['ingredients_per_recipe'],
+            favorites=options['favorites'], carts=options['carts'],
+            subscriptions=options['subscriptions'],
+            catalog_path=options['catalog'])
+        elapsed = time.perf_counter() - started
+        total = sum(inserted.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'Successfully inserted {total} rows in {elapsed:.1f}s, '
+            f'{total / max(elapsed, 1e-9):.0f} rows/s'))
@@ -0,0 +1,17 @@
+# Generated by Django 2.2.19 on 2026-10-18 02:19
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='recipe',
+            options={'ordering': ('-pub_date', '-id'), 'verbose_name': ('Рецепт',), 'verbose_name_plural': 'Создание рецепта'},
+        ),
+    ]
@@ -0,0 +1,35 @@
+from django.db import migrations
+
+# istartswith compiles to UPPER("name"::text) LIKE UPPER(%s) on PostgreSQL;
+# only an index on that expression can serve it.
+PREFIX_INDEX = (
+    'CREATE INDEX IF NOT EXISTS ingredient_name_upper_prefix_idx '
+    'ON recipes_ingredient (UPPER(name::text) text_pattern_ops)')
+
+
+def create_indexes(apps, schema_editor):
+    """
+    Индекс поиска по началу названия продукта есть только в PostgreSQL.
+    The product name prefix search index exists only in PostgreSQL.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(PREFIX_INDEX)
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'DROP INDEX IF EXISTS ingredient_name_upper_prefix_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
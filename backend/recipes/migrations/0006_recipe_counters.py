@@ -0,0 +1,44 @@
+# Generated by Django 2.2.19 on 2026-10-18 02:35
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+COUNTERS = (
+    ('recipes', 'Recipe', 'favorites_count', 'Favorite', 'recipe'),
+    ('recipes', 'Recipe', 'carts_count', 'ShoppingCart', 'recipe'),
+    ('users', 'CustomUser', 'recipes_count', 'Recipe', 'author'),
+    ('users', 'CustomUser', 'followers_count', 'Subscribe', 'following'),
+)
+
+
+def fill_counters(apps, schema_editor):
+    for app_label, model_name, field, counted_name, foreign_key in COUNTERS:
+        counted = apps.get_model('recipes', counted_name).objects.filter(
+            **{foreign_key: OuterRef('pk')}
+        ).order_by().values(foreign_key).annotate(
+            total=Count('pk')).values('total')
+        apps.get_model(app_label, model_name).objects.update(
+            **{field: Coalesce(Subquery(counted), 0)})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_ingredient_name_search_indexes'),
+        ('users', '0003_user_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='carts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Обновляется при добавлении и удалении из списка покупок.', verbose_name='Число добавлений в список покупок'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Обновляется при добавлении и удалении из избранного.', verbose_name='Число добавлений в избранное'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 2.2.19 on 2026-10-18 03:08
+
+import os
+
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+from django.db.models import F
+
+
+def small_copy_name(name):
+    # The copy naming of recipes.images when the field was added, frozen
+    # here so that later changes to that module cannot break the migration.
+    directory, filename = os.path.split(name)
+    stem = os.path.splitext(filename)[0]
+    return os.path.join(directory, 'variants', f'{stem}_small.webp')
+
+
+def mark_existing_variants(apps, schema_editor):
+    # The copies made before the field existed are found on disk once here
+    # instead of on every serialization.
+    Recipe = apps.get_model('recipes', 'Recipe')
+    marked = [
+        pk for pk, image in Recipe.objects.exclude(image='').values_list(
+            'pk', 'image').iterator()
+        if default_storage.exists(small_copy_name(image))
+    ]
+    for start in range(0, len(marked), 500):
+        Recipe.objects.filter(pk__in=marked[start:start + 500]).update(
+            image_variants_for=F('image'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_recipe_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='image_variants_for',
+            field=models.CharField(blank=True, editable=False, help_text='Имя фотографии, для которой созданы уменьшенные копии.', max_length=100, verbose_name='Фото с уменьшенными копиями'),
+        ),
+        migrations.RunPython(mark_existing_variants, migrations.RunPython.noop),
+    ]
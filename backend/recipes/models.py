@@ -1,9 +1,16 @@
+import threading
+
 from colorfield.fields import ColorField
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models import BooleanField, Exists, F, OuterRef, Prefetch, Value
 
 from users.models import CustomUser
 
+# Names of the data sets already incremented by the commit hooks that
+# are running on this thread, per database alias.
+bumped_on_commit = threading.local()
+
 
 class Ingredient(models.Model):
     """
@@ -81,6 +88,70 @@ class Tag(models.Model):
         return self.slug
 
 
+class RecipeQuerySet(models.QuerySet):
+    """
+    Набор запросов модели рецептов.
+    Recipe model queryset.
+    """
+
+    def with_user_flags(self, user):
+        """
+        Аннотирует рецепты флагами is_favorited и is_in_shopping_cart
+        для пользователя одним запросом.
+        Annotates recipes with the is_favorited and is_in_shopping_cart
+        flags of the user within the same query.
+        """
+        if user.is_anonymous:
+            return self.annotate(
+                is_favorited=Value(False, output_field=BooleanField()),
+                is_in_shopping_cart=Value(False, output_field=BooleanField()),
+            )
+        return self.annotate(
+            is_favorited=Exists(Favorite.objects.filter(
+                user=user, recipe=OuterRef('pk'))),
+            is_in_shopping_cart=Exists(ShoppingCart.objects.filter(
+                user=user, recipe=OuterRef('pk'))),
+        )
+
+    def with_viewer_state(self, user):
+        """
+        Только поля, от которых зависит представление рецепта для
+        пользователя: время изменения, флаги и подписка на автора.
+        Only the fields the recipe representation for the user depends on:
+        the modification time, the flags and the author subscription.
+        """
+        if user.is_anonymous:
+            subscribed = Value(False, output_field=BooleanField())
+        else:
+            subscribed = Exists(Subscribe.objects.filter(
+                user=user, following=OuterRef('author_id')))
+        return self.with_user_flags(user).annotate(
+            is_author_subscribed=subscribed,
+        ).only('id', 'pub_date', 'updated_at')
+
+    def with_related(self, user):
+        """
+        Подгружает автора с флагом подписки, теги и продукты рецептов
+        фиксированным числом запросов.
+        Loads the authors with the subscription flag, the tags and
+        the products of the recipes in a fixed number of queries.
+        """
+        if user.is_anonymous:
+            authors = CustomUser.objects.annotate(
+                is_subscribed=Value(False, output_field=BooleanField()))
+        else:
+            authors = CustomUser.objects.annotate(
+                is_subscribed=Exists(Subscribe.objects.filter(
+                    user=user, following=OuterRef('pk'))))
+        return self.with_user_flags(user).prefetch_related(
+            Prefetch('author', queryset=authors),
+            Prefetch('tags', queryset=Tag.objects.order_by('id')),
+            Prefetch('ingredientamount',
+                     queryset=IngredientRecipe.objects.select_related(
+                         'ingredient')),
+        )
+
+
 class Recipe(models.Model):
     """
     Создание модели рецептов.
@@ -103,6 +174,13 @@ class Recipe(models.Model):
         upload_to='recipes/image/',
         help_text="Загрузите картинку блюда."
     )
+    image_variants_for = models.CharField(
+        max_length=100,
+        blank=True,
+        editable=False,
+        verbose_name='Фото с уменьшенными копиями',
+        help_text='Имя фотографии, для которой созданы уменьшенные копии.'
+    )
     text = models.TextField(
         verbose_name="Описание",
         help_text="Введите описание блюда.",
@@ -133,6 +211,23 @@ class Recipe(models.Model):
         auto_now_add=True,
         verbose_name='Дата создания',
         help_text='Добавить дату создания.')
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения',
+        help_text='Обновляется при изменении рецепта, его тегов '
+                  'и продуктов.')
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Число добавлений в избранное',
+        help_text='Обновляется при добавлении и удалении из избранного.')
+    carts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Число добавлений в список покупок',
+        help_text='Обновляется при добавлении и удалении из списка покупок.')
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
         """
@@ -141,7 +236,11 @@ class Recipe(models.Model):
         """
         verbose_name = "Рецепт",
         verbose_name_plural = "Создание рецепта"
-        ordering = ('-pub_date', )
+        ordering = ('-pub_date', '-id')
+        indexes = [
+            models.Index(fields=['-pub_date', '-id'],
+                         name='recipe_pub_date_id_idx'),
+        ]
 
     def __str__(self):
         """
@@ -232,6 +331,10 @@ class IngredientRecipe(models.Model):
                 name='unique_ingredient_recipe'
             )
         ]
+        indexes = [
+            models.Index(fields=['recipe', 'ingredient', 'amount'],
+                         name='ingredient_recipe_cover_idx'),
+        ]
         verbose_name = 'Продукты в рецепте'
         verbose_name_plural = 'Продукты в рецепте'
 
@@ -271,6 +374,10 @@ class TagRecipe(models.Model):
             models.UniqueConstraint(fields=['tags', 'recipe'],
                                     name='unique_tagrecipe')
         ]
+        indexes = [
+            models.Index(fields=['recipe', 'tags'],
+                         name='tag_recipe_recipe_tags_idx'),
+        ]
 
     def __str__(self):
         """"
@@ -363,3 +470,97 @@ class Subscribe(models.Model):
         Method of string representation of the model.
         """
         return f'{self.user}'
+
+
+class DataVersion(models.Model):
+    """
+    Создание модели версий данных для сброса кешей во всех процессах.
+    Creating a data version model for invalidating caches in all processes.
+    """
+    name = models.CharField(
+        unique=True,
+        max_length=64,
+        verbose_name='Название набора данных',
+        help_text='Введите название набора данных'
+    )
+    version = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Версия',
+        help_text='Номер версии набора данных'
+    )
+
+    class Meta:
+        """
+        Параметры модели.
+        Model parameters.
+        """
+        verbose_name = 'Версия данных'
+        verbose_name_plural = 'Версии данных'
+
+    def __str__(self):
+        """"
+        Метод строкового представления модели.
+        Method of string representation of the model.
+        """
+        return f'{self.name} {self.version}'
+
+    @classmethod
+    def get_version(cls, name):
+        """
+        Метод получения текущей версии набора данных.
+        The method of getting the current version of the data set.
+        """
+        version = cls.objects.filter(name=name).values_list(
+            'version', flat=True).first()
+        return version or 0
+
+    @classmethod
+    def get_versions(cls, *names):
+        """
+        Метод получения версий нескольких наборов данных одним запросом.
+        The method of getting the versions of several data sets
+        in one query.
+        """
+        versions = dict(cls.objects.filter(name__in=names).values_list(
+            'name', 'version'))
+        return tuple(versions.get(name, 0) for name in names)
+
+    @classmethod
+    def bump(cls, name):
+        """
+        Метод увеличения версии набора данных.
+        The method of incrementing the version of the data set.
+        """
+        if not cls.objects.filter(name=name).update(
+                version=F('version') + 1):
+            _, created = cls.objects.get_or_create(
+                name=name, defaults={'version': 1})
+            if not created:
+                cls.objects.filter(name=name).update(
+                    version=F('version') + 1)
+
+    @classmethod
+    def bump_on_commit(cls, name, using=None):
+        """
+        Метод увеличения версии набора данных один раз после фиксации
+        текущей транзакции, сколько бы строк в ней ни изменилось;
+        вне транзакции версия увеличивается сразу.
+        The method of incrementing the version of the data set once after
+        the current transaction commits, however many rows it changes;
+        outside a transaction the version is incremented at once.
+        """
+        connection = transaction.get_connection(using)
+        if not connection.in_atomic_block:
+            cls.bump(name)
+            return
+        bumped = vars(bumped_on_commit).setdefault(connection.alias, set())
+        # Every hook is registered, so a rolled back savepoint cannot drop
+        # the only one; the hooks of an earlier commit have all run by now.
+        bumped.clear()
+
+        def bump():
+            if name not in bumped:
+                bumped.add(name)
+                cls.bump(name)
+
+        transaction.on_commit(bump, using)
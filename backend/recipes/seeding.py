@@ -0,0 +1,323 @@
+"""
+Генерация воспроизводимых синтетических данных пакетными вставками
+с распределениями, близкими к реальным: популярность авторов, рецептов
+и продуктов и активность пользователей подчиняются степенному закону.
+Generating reproducible synthetic data with batched inserts and
+close-to-real distributions: the popularity of authors, recipes and
+products and the activity of users follow a power law.
+"""
+import csv
+import io
+import os
+import random
+import time
+from itertools import accumulate, islice
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from PIL import Image
+
+from users.models import CustomUser
+
+from .counters import fill_counters
+from .images import DEFAULT_FORMAT, process_recipe_image, variant_name
+from .models import (DataVersion, Favorite, Ingredient, IngredientRecipe,
+                     Recipe, ShoppingCart, Subscribe, Tag, TagRecipe)
+from .signals import INGREDIENTS_VERSION, RECIPES_VERSION, TAGS_VERSION
+
+SEED_IMAGE = 'recipes/image/seed.png'
+# The placeholder photo of the seeded recipes, written on the first run.
+SEED_IMAGE_SIZE = (800, 600)
+SEED_IMAGE_COLOR = '#E0D7C6'
+CATALOG_PATH = os.path.join(
+    settings.BASE_DIR, 'recipes', 'data', 'ingredients.csv')
+# (name, color, slug, weight of the tag among the recipe tags)
+SEED_TAGS = (
+    ('Завтрак', '#E26C2D', 'breakfast', 0.25),
+    ('Обед', '#49B64E', 'lunch', 0.35),
+    ('Ужин', '#8775D2', 'dinner', 0.4),
+)
+OTHER_TAG_WEIGHT = 0.1
+# Weights of the recipes with one, two and three tags.
+TAG_COUNT_WEIGHTS = (0.6, 0.3, 0.1)
+
+
+def first_free_id(model):
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+def reset_sequences(*models):
+    """
+    Сдвиг последовательностей первичных ключей после вставки строк
+    с явными ключами.
+    Moving the primary key sequences after inserting rows with explicit
+    keys.
+    """
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), models):
+            cursor.execute(sql)
+
+
+class DatasetBuilder:
+    """
+    Построитель набора данных: пользователи, рецепты с тегами
+    и продуктами, избранное, списки покупок и подписки. Строки
+    генерируются потоком и пишутся пакетами через bulk_create или COPY
+    (PostgreSQL). Ключи пользователей и рецептов задаются явно, поэтому
+    связи строятся без чтения вставленных строк.
+    A dataset builder: users, recipes with tags and products, favorites,
+    shopping carts and subscriptions. The rows are generated as a stream
+    and written in batches with bulk_create or COPY (PostgreSQL). The user
+    and recipe keys are set explicitly, so the relations are built without
+    reading the inserted rows back.
+    """
+
+    def __init__(self, seed=0, batch_size=1000, use_copy=False, alpha=1.0,
+                 report=None):
+        self.random = random.Random(seed)
+        self.batch_size = batch_size
+        self.use_copy = use_copy
+        self.alpha = alpha
+        self.report = report
+        self.inserted = {}
+
+    def zipf_weights(self, population):
+        """
+        Накопленные веса степенного закона по перемешанным рангам.
+        The cumulative power law weights by shuffled ranks.
+        """
+        ranks = list(range(1, len(population) + 1))
+        self.random.shuffle(ranks)
+        return list(accumulate(rank ** -self.alpha for rank in ranks))
+
+    def weighted_sample(self, population, cum_weights, count):
+        """
+        count разных элементов с вероятностями по накопленным весам;
+        при большой доле выборки - равномерно.
+        count distinct elements with the probabilities by the cumulative
+        weights; uniformly for a large share of the population.
+        """
+        if count * 4 > len(population):
+            return self.random.sample(population, count)
+        chosen = set()
+        for _ in range(10):
+            chosen.update(self.random.choices(
+                population, cum_weights=cum_weights, k=count - len(chosen)))
+            if len(chosen) == count:
+                break
+        while len(chosen) < count:
+            chosen.add(self.random.choice(population))
+        return sorted(chosen)
+
+    def activity(self, population, mean, limit):
+        """
+        Число действий каждого элемента: в среднем mean, по степенному
+        закону, не больше limit.
+        The number of actions of every element: mean on average, by
+        a power law, at most limit.
+        """
+        cum_weights = self.zipf_weights(population)
+        scale = mean * len(population) / cum_weights[-1]
+        previous = 0
+        counts = []
+        for weight in cum_weights:
+            counts.append(min(round((weight - previous) * scale), limit))
+            previous = weight
+        return counts
+
+    def write(self, model, rows):
+        """
+        Запись строк пакетами с отчётом о скорости.
+        Writing the rows in batches with a speed report.
+        """
+        started = time.perf_counter()
+        total = 0
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                break
+            if self.use_copy:
+                self.copy(model, batch)
+            else:
+                # Django 2.2 does not cap an explicit batch size by the
+                # backend limit on query parameters.
+                model.objects.bulk_create(batch, batch_size=min(
+                    self.batch_size, connection.ops.bulk_batch_size(
+                        model._meta.concrete_fields, batch)))
+            total += len(batch)
+        elapsed = time.perf_counter() - started
+        label = model._meta.label
+        self.inserted[label] = self.inserted.get(label, 0) + total
+        if self.report is not None:
+            self.report(f'{label}: {total} rows in {elapsed:.1f}s, '
+                        f'{total / max(elapsed, 1e-9):.0f} rows/s')
+
+    def copy(self, model, batch):
+        fields = [field for field in model._meta.concrete_fields
+                  if not (field.primary_key and batch[0].pk is None)]
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for obj in batch:
+            values = (field.get_db_prep_save(field.pre_save(obj, True),
+                                             connection)
+                      for field in fields)
+            writer.writerow(
+                ['\\N' if value is None else value for value in values])
+        buffer.seek(0)
+        quote = connection.ops.quote_name
+        columns = ', '.join(quote(field.column) for field in fields)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f'COPY {quote(model._meta.db_table)} ({columns}) '
+                "FROM STDIN WITH (FORMAT csv, NULL '\\N')", buffer)
+
+    def tags(self):
+        if not Tag.objects.exists():
+            self.write(Tag, (Tag(name=name, color=color, slug=slug)
+                             for name, color, slug, _ in SEED_TAGS))
+        weights = {slug: weight for _, _, slug, weight in SEED_TAGS}
+        return [
+            (tag_id, weights.get(slug, OTHER_TAG_WEIGHT))
+            for tag_id, slug in Tag.objects.order_by('id').values_list(
+                'id', 'slug')
+        ]
+
+    def ingredients(self, path):
+        """
+        Продукты каталога; пустой каталог загружается из ingredients.csv.
+        The catalog products; an empty catalog is loaded from
+        ingredients.csv.
+        """
+        if not Ingredient.objects.exists():
+            with open(path, encoding='utf-8') as file:
+                catalog = {}
+                for row in csv.reader(file):
+                    if row:
+                        catalog.setdefault(row[0].strip(), row[1].strip())
+            self.write(Ingredient, (
+                Ingredient(id=pk, name=name, measurement_unit=unit)
+                for pk, (name, unit) in enumerate(catalog.items(), 1)))
+            reset_sequences(Ingredient)
+        return list(Ingredient.objects.order_by('id').values_list(
+            'id', flat=True))
+
+    def seed_image(self):
+        """
+        Заглушка фотографии рецептов с уменьшенными копиями; создаётся
+        в хранилище, если её там нет.
+        The recipe photo placeholder with its resized copies; it is created
+        in the storage when missing.
+        """
+        image = Recipe(image=SEED_IMAGE).image
+        storage = image.storage
+        if not storage.exists(SEED_IMAGE):
+            buffer = io.BytesIO()
+            Image.new('RGB', SEED_IMAGE_SIZE, SEED_IMAGE_COLOR).save(
+                buffer, 'PNG')
+            storage.save(SEED_IMAGE, ContentFile(buffer.getvalue()))
+        variant = next(iter(settings.RECIPE_IMAGE_VARIANTS))
+        if not storage.exists(
+                variant_name(SEED_IMAGE, variant, DEFAULT_FORMAT)):
+            process_recipe_image(image)
+
+    def recipe_rows(self, recipe_ids, user_ids):
+        authors = iter(())
+        for number, pk in enumerate(recipe_ids):
+            if number % self.batch_size == 0:
+                authors = iter(self.random.choices(
+                    user_ids, cum_weights=self.author_weights,
+                    k=self.batch_size))
+            yield Recipe(id=pk, author_id=next(authors),
+                         name=f'Рецепт {pk}', text='Описание рецепта. ' * 10,
+                         image=SEED_IMAGE, image_variants_for=SEED_IMAGE,
+                         cooking_time=self.random.randint(5, 120))
+
+    def tag_rows(self, recipe_ids, tags):
+        counts = range(1, len(TAG_COUNT_WEIGHTS) + 1)
+        for recipe_id in recipe_ids:
+            count = self.random.choices(counts, weights=TAG_COUNT_WEIGHTS)[0]
+            pool = list(tags)
+            for _ in range(min(count, len(pool))):
+                index = self.random.choices(
+                    range(len(pool)),
+                    weights=[weight for _, weight in pool])[0]
+                tag_id, _ = pool.pop(index)
+                yield TagRecipe(recipe_id=recipe_id, tags_id=tag_id)
+
+    def ingredient_rows(self, recipe_ids, ingredient_ids, per_recipe):
+        cum_weights = self.zipf_weights(ingredient_ids)
+        for recipe_id in recipe_ids:
+            for ingredient_id in self.weighted_sample(
+                    ingredient_ids, cum_weights, per_recipe):
+                yield IngredientRecipe(recipe_id=recipe_id,
+                                       ingredient_id=ingredient_id,
+                                       amount=self.random.randint(1, 500))
+
+    def user_recipe_rows(self, model, user_ids, recipe_ids, cum_weights,
+                         mean):
+        counts = self.activity(user_ids, mean, len(recipe_ids))
+        for user_id, count in zip(user_ids, counts):
+            for recipe_id in self.weighted_sample(
+                    recipe_ids, cum_weights, count):
+                yield model(user_id=user_id, recipe_id=recipe_id)
+
+    def subscribe_rows(self, user_ids, mean):
+        counts = self.activity(user_ids, mean, len(user_ids) - 1)
+        for user_id, count in zip(user_ids, counts):
+            following = self.weighted_sample(
+                user_ids, self.author_weights, count + 1)
+            for following_id in [pk for pk in following
+                                 if pk != user_id][:count]:
+                yield Subscribe(user_id=user_id, following_id=following_id)
+
+    def build(self, users, recipes, ingredients_per_recipe=6, favorites=5,
+              carts=3, subscriptions=3, catalog_path=CATALOG_PATH):
+        """
+        Вставка набора в одной транзакции; favorites, carts
+        и subscriptions - среднее число на пользователя. Возвращает число
+        вставленных строк по моделям.
+        Inserting the dataset in one transaction; favorites, carts and
+        subscriptions are the mean numbers per user. Returns the number of
+        inserted rows by model.
+        """
+        with transaction.atomic():
+            tags = self.tags()
+            ingredient_ids = self.ingredients(catalog_path)
+            per_recipe = min(ingredients_per_recipe, len(ingredient_ids))
+            first_user = first_free_id(CustomUser)
+            user_ids = range(first_user, first_user + users)
+            # Authors popular for their recipes are popular to follow too.
+            self.author_weights = self.zipf_weights(user_ids)
+            self.write(CustomUser, (
+                CustomUser(id=pk, username=f'seed{pk}',
+                           email=f'seed{pk}@example.com',
+                           first_name='Seed', last_name=str(pk),
+                           password='!')
+                for pk in user_ids))
+            first_recipe = first_free_id(Recipe)
+            recipe_ids = range(first_recipe, first_recipe + recipes)
+            self.seed_image()
+            self.write(Recipe, self.recipe_rows(recipe_ids, user_ids))
+            reset_sequences(CustomUser, Recipe)
+            self.write(TagRecipe, self.tag_rows(recipe_ids, tags))
+            self.write(IngredientRecipe, self.ingredient_rows(
+                recipe_ids, ingredient_ids, per_recipe))
+            recipe_weights = self.zipf_weights(recipe_ids)
+            for model, mean in ((Favorite, favorites),
+                                (ShoppingCart, carts)):
+                self.write(model, self.user_recipe_rows(
+                    model, user_ids, recipe_ids, recipe_weights, mean))
+            self.write(Subscribe, self.subscribe_rows(user_ids, subscriptions))
+            started = time.perf_counter()
+            fill_counters(CustomUser.objects.filter(pk__gte=first_user))
+            fill_counters(Recipe.objects.filter(pk__gte=first_recipe))
+            if self.report is not None:
+                self.report(f'counters: '
+                            f'{time.perf_counter() - started:.1f}s')
+            for name in (RECIPES_VERSION, TAGS_VERSION, INGREDIENTS_VERSION):
+                DataVersion.bump(name)
+        return self.inserted
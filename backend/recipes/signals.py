@@ -0,0 +1,294 @@
+"""
+Обработчики сигналов моделей рецептов.
+Recipe model signal handlers.
+"""
+import logging
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from users.models import CustomUser
+
+from .counters import COUNTERS, increment
+from .images import delete_variants, has_variants, process_recipe_image
+from .models import (DataVersion, Favorite, Ingredient, IngredientRecipe,
+                     Recipe, ShoppingCart, Subscribe, Tag, TagRecipe)
+
+logger = logging.getLogger(__name__)
+
+INGREDIENTS_VERSION = 'ingredients'
+TAGS_VERSION = 'tags'
+RECIPES_VERSION = 'recipes'
+# Author fields shown in the recipe representation.
+AUTHOR_FIELDS = ('username', 'email', 'first_name', 'last_name')
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def bump_ingredients_version(sender, **kwargs):
+    """
+    Увеличение версии каталога продуктов при его изменении.
+    Incrementing the product catalog version when it changes.
+    """
+    DataVersion.bump_on_commit(INGREDIENTS_VERSION)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def bump_tags_version(sender, **kwargs):
+    """
+    Увеличение версии справочника тегов при его изменении.
+    Incrementing the tag catalog version when it changes.
+    """
+    DataVersion.bump_on_commit(TAGS_VERSION)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_save, sender=TagRecipe)
+@receiver(post_delete, sender=TagRecipe)
+@receiver(post_save, sender=IngredientRecipe)
+@receiver(post_delete, sender=IngredientRecipe)
+def bump_recipes_version(sender, **kwargs):
+    """
+    Увеличение версии рецептов при изменении рецепта, его тегов
+    или продуктов.
+    Incrementing the recipes version when a recipe, its tags
+    or its products change.
+    """
+    DataVersion.bump_on_commit(RECIPES_VERSION)
+
+
+@receiver(pre_save, sender=CustomUser)
+def remember_author_changes(sender, instance, update_fields=None,
+                            using=None, **kwargs):
+    """
+    Отметка об изменении данных автора, входящих в представление
+    рецептов, по сравнению с сохранёнными значениями.
+    Marking a change of the author data that is part of the recipe
+    representation, compared with the stored values.
+    """
+    fields = AUTHOR_FIELDS
+    if update_fields is not None:
+        fields = tuple(field for field in fields if field in update_fields)
+    stored = None
+    if fields and instance.pk is not None:
+        stored = sender.objects.using(using).filter(
+            pk=instance.pk).values_list(*fields).first()
+    instance.author_changed = stored is not None and stored != tuple(
+        getattr(instance, field) for field in fields)
+
+
+@receiver(post_save, sender=CustomUser)
+def bump_recipes_version_for_author(sender, instance, **kwargs):
+    """
+    Увеличение версии рецептов при изменении имени, фамилии, логина
+    или почты автора: они входят в представление рецептов.
+    Incrementing the recipes version when the name, the surname,
+    the username or the email of an author changes: they are part
+    of the recipe representation.
+    """
+    if not instance.__dict__.pop('author_changed', False):
+        return
+    if Recipe.objects.filter(author_id=instance.pk).update(
+            updated_at=timezone.now()):
+        DataVersion.bump_on_commit(RECIPES_VERSION)
+
+
+@receiver(post_save, sender=TagRecipe)
+@receiver(post_delete, sender=TagRecipe)
+@receiver(post_save, sender=IngredientRecipe)
+@receiver(post_delete, sender=IngredientRecipe)
+def touch_recipe(sender, instance, **kwargs):
+    """
+    Обновление времени изменения рецепта при изменении его тегов
+    или продуктов.
+    Updating the recipe modification time when its tags or products
+    change.
+    """
+    Recipe.objects.filter(pk=instance.recipe_id).update(
+        updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Tag)
+def touch_tag_recipes(sender, instance, created, **kwargs):
+    """
+    Обновление времени изменения рецептов с изменённым тегом.
+    Updating the modification time of the recipes with a changed tag.
+    """
+    if not created:
+        Recipe.objects.filter(tags=instance).update(
+            updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Ingredient)
+def touch_ingredient_recipes(sender, instance, created, **kwargs):
+    """
+    Обновление времени изменения рецептов с изменённым продуктом.
+    Updating the modification time of the recipes with a changed product.
+    """
+    if not created:
+        Recipe.objects.filter(ingredients=instance).update(
+            updated_at=timezone.now())
+
+
+@receiver(pre_save, sender=Recipe)
+def forget_replaced_image_variants(sender, instance, **kwargs):
+    """
+    Снятие отметки о копиях заменённой фотографии; сами копии удаляются
+    после фиксации транзакции.
+    Clearing the copies mark of a replaced photo; the copies themselves
+    are deleted after the transaction commits.
+    """
+    stale = instance.image_variants_for
+    if stale and stale != instance.image.name:
+        instance.replaced_image_variants = stale
+        instance.image_variants_for = ''
+
+
+@receiver(post_save, sender=Recipe)
+def create_image_variants(sender, instance, **kwargs):
+    """
+    Создание копий фотографии рецепта после фиксации транзакции,
+    если их ещё нет, и удаление копий заменённой фотографии.
+    Уменьшение выполняется в потоке запроса и увеличивает время ответа
+    на загрузку фотографии; массовое создание копий выполняет команда
+    create_image_variants.
+    Creating the recipe photo copies after the transaction commits
+    if they do not exist yet, and deleting the copies of a replaced photo.
+    The resizing runs on the request thread and adds to the response time
+    of a photo upload; bulk backfills belong to the create_image_variants
+    command.
+    """
+    image = instance.image
+    stale = instance.__dict__.pop('replaced_image_variants', None)
+    if stale:
+        transaction.on_commit(lambda: delete_variants(image.storage, stale))
+    if not image or has_variants(image):
+        return
+
+    def process():
+        try:
+            process_recipe_image(image)
+        except (OSError, ValueError) as error:
+            logger.warning('Image variants of %s failed: %s',
+                           image.name, error)
+            return
+        instance.image_variants_for = image.name
+        # Responses pointed at the original until now.
+        if Recipe.objects.filter(pk=instance.pk, image=image.name).update(
+                image_variants_for=image.name, updated_at=timezone.now()):
+            DataVersion.bump_on_commit(RECIPES_VERSION)
+
+    transaction.on_commit(process)
+
+
+@receiver(post_delete, sender=Recipe)
+def delete_image_variants(sender, instance, **kwargs):
+    """
+    Удаление копий фотографии удалённого рецепта после фиксации
+    транзакции.
+    Deleting the photo copies of a deleted recipe after the transaction
+    commits.
+    """
+    if instance.image_variants_for:
+        storage, name = instance.image.storage, instance.image_variants_for
+        transaction.on_commit(lambda: delete_variants(storage, name))
+
+
+def counted_keys(sender):
+    """
+    Внешние ключи модели sender, по которым ведутся счётчики.
+    The foreign keys of the sender model that counters are kept by.
+    """
+    return tuple(
+        f'{foreign_key}_id'
+        for model, field, counted_model, foreign_key in COUNTERS
+        if counted_model is sender
+    )
+
+
+def update_counters(sender, instance, delta):
+    """
+    Изменение на delta счётчиков, которые считают строки модели sender.
+    Changing by delta the counters that count the rows of the sender model.
+    """
+    for model, field, counted_model, foreign_key in COUNTERS:
+        if counted_model is sender:
+            increment(model, getattr(instance, f'{foreign_key}_id'),
+                      field, delta)
+
+
+def move_counters(sender, instance, stored):
+    """
+    Перенос счётчиков со строк прежних внешних ключей на строки новых.
+    Moving the counters from the rows of the old foreign keys to the rows
+    of the new ones.
+    """
+    for model, field, counted_model, foreign_key in COUNTERS:
+        key = f'{foreign_key}_id'
+        if counted_model is not sender or key not in stored:
+            continue
+        old, new = stored[key], getattr(instance, key)
+        if old != new:
+            increment(model, old, field, -1)
+            increment(model, new, field, 1)
+
+
+@receiver(pre_save, sender=Favorite)
+@receiver(pre_save, sender=ShoppingCart)
+@receiver(pre_save, sender=Recipe)
+@receiver(pre_save, sender=Subscribe)
+def remember_counted_keys(sender, instance, raw=False, update_fields=None,
+                          using=None, **kwargs):
+    """
+    Запоминание сохранённых значений внешних ключей, по которым ведутся
+    счётчики, чтобы перенести счётчик при смене ключа.
+    Remembering the stored values of the foreign keys that counters are
+    kept by, to move a counter when the key changes.
+    """
+    keys = counted_keys(sender)
+    if update_fields is not None:
+        keys = tuple(key for key in keys
+                     if key[:-len('_id')] in update_fields)
+    stored = None
+    if keys and not raw and not instance._state.adding:
+        stored = sender.objects.using(using).filter(
+            pk=instance.pk).values(*keys).first()
+    instance.stored_counted_keys = stored
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Subscribe)
+def increment_counters(sender, instance, created, raw=False, **kwargs):
+    """
+    Увеличение счётчиков при создании строки и перенос счётчика при смене
+    внешнего ключа, например автора рецепта; загрузка фикстур счётчики
+    не меняет.
+    Incrementing the counters when a row is created and moving a counter
+    when a foreign key changes, such as the recipe author; loading
+    fixtures does not change the counters.
+    """
+    stored = instance.__dict__.pop('stored_counted_keys', None)
+    if raw:
+        return
+    if created:
+        update_counters(sender, instance, 1)
+    elif stored:
+        move_counters(sender, instance, stored)
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingCart)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Subscribe)
+def decrement_counters(sender, instance, **kwargs):
+    """
+    Уменьшение счётчиков при удалении строки.
+    Decrementing the counters when a row is deleted.
+    """
+    update_counters(sender, instance, -1)
@@ -1,13 +1,17 @@
 from django.contrib import admin
 
+from foodgram.pagination import CountProviderPaginator
+
 from .models import CustomUser
 
 
 class CustomUserAdmin(admin.ModelAdmin):
-    list_display = ('username', 'email', 'id')
-    list_filter = ('username', 'email')
-    search_fields = ('username', 'email')
+    list_display = ('username', 'email', 'id',
+                    'recipes_count', 'followers_count')
+    search_fields = ('^username', '^email')
     empty_value_display = '-пусто-'
+    paginator = CountProviderPaginator
+    show_full_result_count = False
 
 
 admin.site.register(CustomUser, CustomUserAdmin)
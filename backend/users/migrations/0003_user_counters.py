@@ -0,0 +1,23 @@
+# Generated by Django 2.2.19 on 2026-10-18 02:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_auto_20220621_1901'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Обновляется при создании и удалении подписок.', verbose_name='Число подписчиков'),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='recipes_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Обновляется при создании и удалении рецептов.', verbose_name='Число рецептов'),
+        ),
+    ]
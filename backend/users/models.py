@@ -38,6 +38,18 @@ class CustomUser(AbstractUser):
         verbose_name="Фамилия",
         help_text="Введите фамилию"
     )
+    recipes_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Число рецептов',
+        help_text='Обновляется при создании и удалении рецептов.'
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Число подписчиков',
+        help_text='Обновляется при создании и удалении подписок.'
+    )
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'first_name', 'last_name', 'password']
 